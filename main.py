@@ -1,76 +1,242 @@
-from fastapi import FastAPI, Request, Form, Depends, HTTPException
+from fastapi import FastAPI, Request, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, ConfigDict
+from typing import List, Dict, Literal, Tuple
 import os
-from dotenv import load_dotenv
+import sys
+import hashlib
+from functools import lru_cache
+from types import MappingProxyType
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, TemplateNotFound
 
-# Load environment variables
-load_dotenv()
+from travel_agent.settings import get_settings
+from travel_agent.utils.batching import MicroBatcher
+
+settings = get_settings()
 
 # Initialize FastAPI app
-app = FastAPI(title="Travel Planner AI")
+app = FastAPI(title="Travel Planner AI", default_response_class=ORJSONResponse)
 
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=settings.cors_origins,
+    allow_credentials=False,
+    allow_methods=["GET", "POST"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=600,
 )
 
-# Set up templates
-templates = Jinja2Templates(directory="templates")
+# Compress HTML pages and JSON responses
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+
+@lru_cache(maxsize=1)
+def get_templates() -> Jinja2Templates:
+    """Return the process-wide templates instance.
+
+    Compiled templates are cached on disk so every worker skips the
+    lexer/parser, and source files are only re-checked in debug mode.
+    """
+    env = Environment(
+        loader=FileSystemLoader("templates"),
+        auto_reload=settings.debug,
+        bytecode_cache=FileSystemBytecodeCache(),
+        cache_size=400,
+        trim_blocks=True,
+        lstrip_blocks=True
+    )
+    return Jinja2Templates(env=env)
+
+class CachedStaticFiles(StaticFiles):
+    """Static files served with cache headers that match how they are referenced.
+
+    Pages link assets with a ``?v=<content hash>`` suffix (see ``_static_url``),
+    so those URLs change on every deploy and are cached for a year; a bare URL
+    must be revalidated. In production /static/ should be served by the reverse
+    proxy or CDN; this mount is a fallback so browsers still cache assets when
+    it is not.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if b"v=" in scope.get("query_string", b""):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
 
 # Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static", html=False), name="static")
 
-# Sample data for the landing page
-POPULAR_DESTINATIONS = [
+# Sample data for the landing page (read-only, shared by every render)
+POPULAR_DESTINATIONS = tuple(MappingProxyType(destination) for destination in (
     {"name": "Araku Valley", "image": "araku.jpg", "description": "Scenic hill station with coffee plantations"},
     {"name": "Kodaikanal", "image": "kodaikanal.jpg", "description": "Princess of Hill Stations"},
     {"name": "Munnar", "image": "munnar.jpg", "description": "Tea gardens and misty mountains"},
-]
+))
 
 class ChatMessage(BaseModel):
-    role: str  # 'user' or 'assistant'
+    model_config = ConfigDict(str_max_length=8192, extra="forbid")
+
+    role: Literal["user", "assistant"]
     content: str
 
+class ChatRequest(BaseModel):
+    """Body of a chat request."""
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True)
+
+    message: str
+
+class ChatResponse(BaseModel):
+    """Reply to a chat request."""
+    model_config = ConfigDict(validate_assignment=False)
+
+    response: str
+
+# Pre-rendered HTML and its ETag for pages whose context never changes at runtime
+_PAGE_CACHE: Dict[str, Tuple[bytes, str]] = {}
+
+@lru_cache(maxsize=None)
+def _static_url(path: str) -> str:
+    """URL of a static asset, versioned by a hash of its contents."""
+    url = app.url_path_for("static", path=path)
+    try:
+        with open(os.path.join("static", path.lstrip("/")), "rb") as f:
+            version = hashlib.blake2b(f.read(), digest_size=6).hexdigest()
+    except OSError:
+        return url
+    return f"{url}?v={version}"
+
+def _url_path_for(name: str, **path_params) -> str:
+    """Host-independent replacement for ``url_for`` so pages render without a request."""
+    if name == "static":
+        return _static_url(path_params["path"])
+    return app.url_path_for(name, **path_params)
+
+def _render_page(template_name: str, **context) -> bytes:
+    """Render a template once and return the UTF-8 encoded HTML."""
+    template = get_templates().get_template(template_name)
+    return template.render(url_for=_url_path_for, **context).encode("utf-8")
+
+def _cache_page(template_name: str, **context) -> None:
+    """Render a page into the cache together with its ETag."""
+    body = _render_page(template_name, **context)
+    # Weak validator: the gzip middleware may re-encode the body
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    _PAGE_CACHE[template_name] = (body, etag)
+
+# Render context of each pre-rendered page
+_PAGE_CONTEXTS: Dict[str, Dict[str, object]] = {
+    "index.html": {
+        "title": "AI Travel Planner - Plan Your Perfect Trip",
+        "popular_destinations": POPULAR_DESTINATIONS,
+    },
+    "chat.html": {
+        "title": "Travel Planning Assistant",
+    },
+}
+
+@app.on_event("startup")
+async def prerender_pages():
+    """Render the static landing and chat pages once per worker.
+
+    A page whose template is missing is skipped here so the app still starts;
+    it is rendered on demand (and fails) only when requested.
+    """
+    for template_name, context in _PAGE_CONTEXTS.items():
+        try:
+            _cache_page(template_name, **context)
+        except TemplateNotFound:
+            print(f"Warning: template {template_name} not found; it will be rendered on request")
+
+# Let browsers fetch the stylesheet before the HTML has been parsed; only
+# advertised when the file is actually there to be served
+_STYLESHEET = "css/styles.css"
+_PRELOAD_HEADERS = (
+    {"Link": f"<{_static_url(_STYLESHEET)}>; rel=preload; as=style"}
+    if os.path.isfile(os.path.join("static", _STYLESHEET))
+    else {}
+)
+
+def _page_response(request: Request, template_name: str) -> Response:
+    """Serve a cached page, answering 304 when the client's copy is current."""
+    if template_name not in _PAGE_CACHE:
+        _cache_page(template_name, **_PAGE_CONTEXTS[template_name])
+    body, etag = _PAGE_CACHE[template_name]
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=body, headers={**headers, **_PRELOAD_HEADERS})
+
 # Routes
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Render the home page."""
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "title": "AI Travel Planner - Plan Your Perfect Trip",
-            "popular_destinations": POPULAR_DESTINATIONS
-        }
-    )
+    return _page_response(request, "index.html")
 
 @app.get("/chat", response_class=HTMLResponse)
 async def chat_ui(request: Request):
     """Render the chat interface."""
-    return templates.TemplateResponse(
-        "chat.html",
-        {
-            "request": request,
-            "title": "Travel Planning Assistant"
-        }
-    )
+    return _page_response(request, "chat.html")
+
+async def _reply_batch(messages: List[str]) -> List[str]:
+    """Generate replies for a batch of chat messages in one call."""
+    # This is a placeholder - in a real app, you'd send the batch to the LLM (e.g. llm.abatch)
+    return [f"I received your message: {message}" for message in messages]
+
+# Concurrent chat requests share a single downstream call
+chat_batcher = MicroBatcher(_reply_batch, max_batch_size=16, max_wait_ms=10)
+
+@app.on_event("shutdown")
+async def stop_chat_batcher():
+    """Stop the chat batching worker."""
+    await chat_batcher.close()
 
-@app.post("/api/chat")
-async def chat(message: str):
+@app.on_event("shutdown")
+async def close_agent_resources():
+    """Close the HTTP sessions and batching worker the agents share across requests.
+
+    Only agents whose module was imported can have opened anything, so
+    nothing is imported here just to close it.
+    """
+    explorer = sys.modules.get("travel_agent.explorer_agent")
+    if explorer is not None:
+        await explorer.ExplorerAgent.close_shared_session()
+    budget = sys.modules.get("travel_agent.budget_agent")
+    if budget is not None:
+        await budget.BudgetCalculationAgent.close_shared_session()
+    food = sys.modules.get("travel_agent.food_agent")
+    if food is not None:
+        await food.FoodAgent.close_shared_session()
+        await food.FoodAgent.close_shared_batcher()
+
+@app.post("/api/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest):
     """Handle chat messages."""
-    # This is a placeholder - in a real app, you'd process the message with your AI
-    response = {"response": f"I received your message: {message}"}
-    return JSONResponse(content=response)
+    return {"response": await chat_batcher.submit(req.message)}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+
+    if settings.debug:
+        # Development: single process with auto-reload
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            loop="auto",
+            http="httptools",
+            workers=os.cpu_count() or 2,
+            reload=False,
+            limit_concurrency=1000,
+            limit_max_requests=10000,
+            timeout_keep_alive=30,
+            backlog=2048,
+            access_log=False
+        )
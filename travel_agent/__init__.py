@@ -4,17 +4,16 @@ Agentic Travel Planner System
 A modular, LLM-powered travel planning system using LangGraph and LangChain.
 """
 
-# Load environment variables from .env file
-from dotenv import load_dotenv
-import os
+import importlib
 
-# Load environment variables from .env file if it exists
-load_dotenv()
+# Load settings (and the .env file) once for the whole process
+from .settings import Settings, get_settings
 
 # Verify required environment variables are set
-required_vars = ['GOOGLE_API_KEY', 'GROQ_API_KEY']
-for var in required_vars:
-    if not os.getenv(var):
+_settings = get_settings()
+for var, value in (('GOOGLE_API_KEY', _settings.google_api_key),
+                   ('GROQ_API_KEY', _settings.groq_api_key)):
+    if not value:
         print(f"Warning: Required environment variable {var} is not set. "
               f"Please set it in your environment or .env file.")
 
@@ -29,12 +28,28 @@ from .base import (
     TravelStyle  # Make sure TravelStyle is imported
 )
 
-from .planner_agent import PlannerAgent
-from .explorer_agent import ExplorerAgent
-from .selector_agent import SelectorAgent
-from .itinerary_agent import ItineraryAgent
-from .formatter_agent import FormatterAgent
-from .workflow import travel_planner_workflow, create_travel_planner_workflow
+# Agents and the workflow pull in LangChain/LangGraph, so they are imported
+# on first attribute access (PEP 562) instead of at package import time
+_LAZY_IMPORTS = {
+    'PlannerAgent': 'planner_agent',
+    'ExplorerAgent': 'explorer_agent',
+    'SelectorAgent': 'selector_agent',
+    'ItineraryAgent': 'itinerary_agent',
+    'FormatterAgent': 'formatter_agent',
+    'travel_planner_workflow': 'workflow',
+    'create_travel_planner_workflow': 'workflow',
+}
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(f".{_LAZY_IMPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
 
 # Define what gets imported with 'from travel_agent import *'
 __all__ = [
@@ -50,7 +65,9 @@ __all__ = [
     'ItineraryAgent',
     'FormatterAgent',
     'travel_planner_workflow',
-    'create_travel_planner_workflow'
+    'create_travel_planner_workflow',
+    'Settings',
+    'get_settings'
 ]
 
 # Package metadata
@@ -1,9 +1,13 @@
 """Base classes for travel agent system."""
+import asyncio
 from abc import ABC, abstractmethod
-from enum import Enum
 from typing import Any, Dict, List, Optional, TypeVar
 from pydantic import BaseModel, Field
 
+# The request model and travel styles used by the workflow and planner,
+# re-exported so there is a single definition of each
+from .models import TravelPlanRequest, TravelStyle
+
 T = TypeVar('T', bound=BaseModel)
 
 class BaseAgent(ABC):
@@ -13,44 +17,14 @@ class BaseAgent(ABC):
     async def process(self, input_data: Any) -> Any:
         """Process input and return output."""
         pass
-
-class TravelStyle(str, Enum):
-    """Enum for different travel styles."""
-    ADVENTURE = "adventure"
-    LUXURY = "luxury"
-    BUDGET = "budget"
-    FAMILY = "family"
-    ROMANTIC = "romantic"
-    SOLO = "solo"
-    BUSINESS = "business"
-    CULTURAL = "cultural"
-    BEACH = "beach"
-    NATURE = "nature"
-    URBAN = "urban"
-    ROAD_TRIP = "road_trip"
-    BACKPACKING = "backpacking"
-    FOODIE = "foodie"
-    HISTORY = "history"
-    ART = "art"
-    SHOPPING = "shopping"
-    WELLNESS = "wellness"
-
-class TravelPlanRequest(BaseModel):
-    """Structured travel plan request."""
-    destination: str = Field(..., description="The travel destination")
-    duration_days: int = Field(..., description="Number of travel days")
-    travel_style: List[TravelStyle] = Field(
-        default_factory=list,
-        description="List of travel styles (e.g., 'romantic', 'adventure')"
-    )
-    budget: Optional[str] = Field(
-        None,
-        description="Budget level (e.g., 'budget', 'mid-range', 'luxury')"
-    )
-    constraints: List[str] = Field(
-        default_factory=list,
-        description="Any constraints (e.g., 'family-friendly', 'wheelchair-accessible')"
-    )
+    
+    async def process_batch(self, inputs: List[Any]) -> List[Any]:
+        """Process several inputs concurrently, returning outputs in input order.
+        
+        Agents backed by an LLM can override this to send a single batched
+        request (e.g. ``chain.abatch``) instead of one request per input.
+        """
+        return list(await asyncio.gather(*(self.process(x) for x in inputs)))
 
 class Activity(BaseModel):
     """An activity in the travel itinerary."""
@@ -75,7 +49,7 @@ class PointOfInterest(BaseModel):
 class DailyItinerary(BaseModel):
     """A single day's itinerary."""
     day: int
-    activities: List[Dict[str, Any]] = Field(default_factory=list)
+    activities: List[Activity] = Field(default_factory=list)
 
 class TravelItinerary(BaseModel):
     """Complete travel itinerary."""
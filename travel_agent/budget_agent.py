@@ -1,10 +1,14 @@
 """Budget Calculation Agent for travel planning with currency conversion."""
-from typing import Dict, List, Optional, Any, Tuple, Union
+from typing import Dict, List, Mapping, Optional, Any, AsyncIterator, ClassVar, Tuple, Union
 from datetime import date, datetime, timedelta
+import asyncio
 import random
-import json
 import os
+import time
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
+import aiohttp
 import requests
 
 from langchain_core.prompts import ChatPromptTemplate
@@ -17,40 +21,105 @@ from .models import (
     TravelPlanRequest, TransportOption, TransportMode
 )
 from .base import BaseAgent
+from .utils.model_config import ModelConfig
+from .utils import fastjson
 
 # Exchange rate API (free tier)
 EXCHANGE_RATE_API = "https://api.exchangerate-api.com/v4/latest/INR"
 EXCHANGE_RATE_CACHE_FILE = Path("data/exchange_rates.json")
-EXCHANGE_RATE_CACHE_EXPIRY = 24 * 60 * 60  # 24 hours in seconds
+EXCHANGE_RATE_CACHE_EXPIRY = 60 * 60  # 1 hour in seconds; refreshes are conditional GETs
+
+# Give up on the LLM budget estimate after this many seconds
+BUDGET_LLM_TIMEOUT = 30
+
+# Fallback rates used when the API is unreachable (shared and read-only)
+FALLBACK_EXCHANGE_RATES = MappingProxyType({
+    'USD': 0.012,  # 1 INR = 0.012 USD
+    'EUR': 0.011,  # 1 INR = 0.011 EUR
+    'GBP': 0.009,  # 1 INR = 0.009 GBP
+    'JPY': 1.8,    # 1 INR = 1.8 JPY
+    'AUD': 0.018,  # 1 INR = 0.018 AUD
+    'CAD': 0.016,  # 1 INR = 0.016 CAD
+    'INR': 1.0     # Base currency
+})
+
+CURRENCY_SYMBOLS = {
+    'USD': '$',
+    'EUR': '€',
+    'GBP': '£',
+    'JPY': '¥',
+    'AUD': 'A$',
+    'CAD': 'C$',
+    'INR': '₹'
+}
+
+# Currencies shown without decimal places
+WHOLE_UNIT_CURRENCIES = frozenset({'JPY', 'INR'})
+
+@lru_cache(maxsize=4096)
+def _format_currency(amount: float, currency: str) -> str:
+    """Format an amount in an upper-cased currency code (memoized)."""
+    symbol = CURRENCY_SYMBOLS.get(currency, currency)
+    
+    # Format with appropriate decimal places
+    if currency in WHOLE_UNIT_CURRENCIES:
+        return f"{symbol}{amount:,.0f}"  # No decimal places for JPY and INR
+    return f"{symbol}{amount:,.2f}"  # Two decimal places for others
+
+# (second, ISO string) of the last formatted timestamp
+_ts_cache: Tuple[int, str] = (0, "")
+
+def _iso_now_cached() -> str:
+    """Return the current local time as an ISO string, formatted at most once per second."""
+    global _ts_cache
+    now = int(time.time())
+    if now == _ts_cache[0]:
+        return _ts_cache[1]
+    value = datetime.fromtimestamp(now).isoformat()
+    _ts_cache = (now, value)
+    return value
 
 class BudgetCalculationAgent(BaseAgent):
     """Agent responsible for calculating and managing travel budgets with currency support."""
     
     # Default daily budget estimates by budget level (per person) in INR
     # Updated to reflect more realistic prices in India for 2023-2024
-    DEFAULT_DAILY_BUDGETS = {
-        BudgetLevel.BUDGET: {
+    DEFAULT_DAILY_BUDGETS = MappingProxyType({
+        BudgetLevel.BUDGET: MappingProxyType({
             "accommodation": 1500.0,    # Budget hotel/hostel
             "food": 1000.0,             # Street food and local restaurants
             "transport": 800.0,         # Local transport and short trips
             "activities": 1200.0,       # Entry fees to attractions
             "misc": 500.0               # Souvenirs, tips, etc.
-        },
-        BudgetLevel.MID_RANGE: {
+        }),
+        BudgetLevel.MID_RANGE: MappingProxyType({
             "accommodation": 4000.0,    # 3-star hotel or homestay
             "food": 2000.0,             # Mid-range restaurants
             "transport": 1500.0,        # Private cabs and transport
             "activities": 2500.0,       # Guided tours and activities
             "misc": 1000.0              # Souvenirs, tips, etc.
-        },
-        BudgetLevel.LUXURY: {
+        }),
+        BudgetLevel.LUXURY: MappingProxyType({
             "accommodation": 10000.0,   # 4-5 star hotel or luxury resort
             "food": 5000.0,             # Fine dining
             "transport": 4000.0,        # Private car with driver
             "activities": 6000.0,       # Premium experiences
             "misc": 3000.0              # Shopping, spa, etc.
-        }
-    }
+        })
+    })
+    
+    # Per-person daily totals for each budget level, summed once
+    DEFAULT_DAILY_TOTALS = MappingProxyType({
+        level: sum(categories.values())
+        for level, categories in DEFAULT_DAILY_BUDGETS.items()
+    })
+    
+    # Shared across agents so exchange-rate fetches reuse pooled keep-alive connections
+    _http_session: ClassVar[requests.Session] = requests.Session()
+    _http_session.headers.update({"Accept-Encoding": "gzip"})
+    # Async counterpart, created on first use inside the running event loop
+    _aio_session: ClassVar[Optional[aiohttp.ClientSession]] = None
+    _aio_session_loop: ClassVar[Optional[asyncio.AbstractEventLoop]] = None
     
     def __init__(self, model_name: str = "llama-3.3-70b-versatile", temperature: float = 0.2):
         """Initialize the BudgetCalculationAgent with the specified Groq model.
@@ -140,11 +209,15 @@ Please provide a detailed budget breakdown in the following JSON format:
         # Create the chain
         self.chain = self.budget_prompt | self.llm | self.parser
         
-        # Initialize the budget chain after defining the prompt
-        self.budget_chain = self.budget_prompt | self.llm | self.parser
+        # Cache of budget estimates (futures, so in-flight requests are shared)
+        self.budget_cache: Dict[tuple, asyncio.Future] = {}
         
-        # Cache for storing budget estimates
-        self.budget_cache = {}
+        # In-memory copy of the exchange rates so conversions don't hit the disk
+        self._rates_cache: Optional[Dict[str, float]] = None
+        self._rates_loaded_at: float = 0.0
+        # Validators from the last API response, for conditional refreshes
+        self._rates_etag: Optional[str] = None
+        self._rates_last_modified: Optional[str] = None
     
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process the budget calculation request.
@@ -173,12 +246,12 @@ Please provide a detailed budget breakdown in the following JSON format:
             }
             
             # Get the LLM response
-            response = await self.budget_chain.ainvoke(formatted_input)
+            response = await self.chain.ainvoke(formatted_input)
             
             # Add metadata
             response["metadata"] = {
                 "model": self.model_name,
-                "timestamp": str(datetime.now().isoformat()),
+                "timestamp": _iso_now_cached(),
                 "currency": "INR"  # Default currency is INR
             }
             
@@ -192,8 +265,6 @@ Please provide a detailed budget breakdown in the following JSON format:
     
     def _initialize_llm(self):
         """Initialize the appropriate LLM based on the model name."""
-        from travel_agent.utils.model_config import ModelConfig
-        
         # If model_name is None, get the default from ModelConfig
         if self.model_name is None:
             provider = ModelConfig.get_provider()
@@ -210,60 +281,171 @@ Please provide a detailed budget breakdown in the following JSON format:
             temperature=self.temperature
         )
         
-    def _get_exchange_rates(self) -> Dict[str, float]:
+    def _load_cached_rates(self) -> Optional[Dict[str, float]]:
         """
-        Get current exchange rates from API or cache.
+        Get exchange rates from memory or the cache file if they are still fresh.
+        
+        Stale rates read from the file are kept in memory together with their
+        validators so the next refresh can be a conditional request.
         
         Returns:
-            Dictionary of currency codes to exchange rates from INR
+            Dictionary of currency codes to exchange rates from INR, or None
         """
+        # Serve from memory while the rates are fresh
+        if self._rates_cache and time.monotonic() - self._rates_loaded_at < EXCHANGE_RATE_CACHE_EXPIRY:
+            return self._rates_cache
+        
         # Create data directory if it doesn't exist
         EXCHANGE_RATE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
         
         # Try to load from cache first
         if EXCHANGE_RATE_CACHE_FILE.exists():
             try:
-                with open(EXCHANGE_RATE_CACHE_FILE, 'r') as f:
-                    cache_data = json.load(f)
+                with open(EXCHANGE_RATE_CACHE_FILE, 'rb') as f:
+                    cache_data = fastjson.loads(f.read())
                     
-                # Check if cache is still valid
                 last_updated = datetime.fromisoformat(cache_data.get('last_updated', '1970-01-01T00:00:00'))
-                if (datetime.now() - last_updated).total_seconds() < EXCHANGE_RATE_CACHE_EXPIRY:
-                    return cache_data.get('rates', {})
+                age = (datetime.now() - last_updated).total_seconds()
+                
+                self._rates_cache = cache_data.get('rates', {})
+                self._rates_etag = cache_data.get('etag')
+                self._rates_last_modified = cache_data.get('last_modified')
+                # Expire the in-memory copy when the file copy expires
+                self._rates_loaded_at = time.monotonic() - age
+                
+                # Check if cache is still valid
+                if age < EXCHANGE_RATE_CACHE_EXPIRY:
+                    return self._rates_cache
                     
             except Exception as e:
                 print(f"Error loading exchange rate cache: {e}")
         
+        return None
+    
+    def _revalidation_headers(self) -> Dict[str, str]:
+        """Build conditional-request headers from the cached response validators."""
+        headers = {}
+        if self._rates_cache:
+            if self._rates_etag:
+                headers['If-None-Match'] = self._rates_etag
+            if self._rates_last_modified:
+                headers['If-Modified-Since'] = self._rates_last_modified
+        return headers
+    
+    def _save_rates(
+        self,
+        rates: Dict[str, float],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> None:
+        """Store exchange rates and their validators in memory and in the cache file."""
+        cache_data = {
+            'last_updated': _iso_now_cached(),
+            'rates': rates,
+            'etag': etag,
+            'last_modified': last_modified
+        }
+        with open(EXCHANGE_RATE_CACHE_FILE, 'wb') as f:
+            f.write(fastjson.dumps(cache_data, indent=True))
+        
+        self._rates_cache = rates
+        self._rates_etag = etag
+        self._rates_last_modified = last_modified
+        self._rates_loaded_at = time.monotonic()
+    
+    def _get_exchange_rates(self) -> Mapping[str, float]:
+        """
+        Get current exchange rates from API or cache.
+        
+        Returns:
+            Dictionary of currency codes to exchange rates from INR
+        """
+        rates = self._load_cached_rates()
+        if rates is not None:
+            return rates
+        
         # If cache is invalid or doesn't exist, fetch from API
         try:
-            response = requests.get(EXCHANGE_RATE_API)
+            response = self._http_session.get(EXCHANGE_RATE_API, headers=self._revalidation_headers(), timeout=5)
+            etag = response.headers.get('ETag', self._rates_etag)
+            last_modified = response.headers.get('Last-Modified', self._rates_last_modified)
+            
+            if response.status_code == 304 and self._rates_cache:
+                # Rates unchanged; keep them and restart the expiry window
+                self._save_rates(self._rates_cache, etag, last_modified)
+                return self._rates_cache
             if response.status_code == 200:
-                data = response.json()
-                rates = data.get('rates', {})
-                
-                # Save to cache
-                cache_data = {
-                    'last_updated': datetime.now().isoformat(),
-                    'rates': rates
-                }
-                with open(EXCHANGE_RATE_CACHE_FILE, 'w') as f:
-                    json.dump(cache_data, f, indent=2)
-                    
+                rates = response.json().get('rates', {})
+                self._save_rates(rates, etag, last_modified)
                 return rates
                 
         except Exception as e:
             print(f"Error fetching exchange rates: {e}")
             
         # Fallback to some default rates if API fails
-        return {
-            'USD': 0.012,  # 1 INR = 0.012 USD
-            'EUR': 0.011,  # 1 INR = 0.011 EUR
-            'GBP': 0.009,  # 1 INR = 0.009 GBP
-            'JPY': 1.8,    # 1 INR = 1.8 JPY
-            'AUD': 0.018,  # 1 INR = 0.018 AUD
-            'CAD': 0.016,  # 1 INR = 0.016 CAD
-            'INR': 1.0     # Base currency
-        }
+        return FALLBACK_EXCHANGE_RATES
+    
+    @classmethod
+    def _get_aio_session(cls) -> aiohttp.ClientSession:
+        """Get the shared async HTTP session, creating it on first use in the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = cls._aio_session
+        # A session from a previous (closed) event loop can't be reused
+        if session is None or session.closed or cls._aio_session_loop is not loop:
+            session = aiohttp.ClientSession()
+            cls._aio_session = session
+            cls._aio_session_loop = loop
+        return session
+    
+    @classmethod
+    async def close_shared_session(cls) -> None:
+        """Close the shared async HTTP session, if one was opened."""
+        session = cls._aio_session
+        cls._aio_session = None
+        cls._aio_session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+    
+    async def _get_exchange_rates_async(self) -> Mapping[str, float]:
+        """
+        Get current exchange rates from API or cache without blocking the event loop.
+        
+        Returns:
+            Dictionary of currency codes to exchange rates from INR
+        """
+        # Fresh rates in memory need no file I/O; otherwise read the file off the event loop
+        if self._rates_cache and time.monotonic() - self._rates_loaded_at < EXCHANGE_RATE_CACHE_EXPIRY:
+            return self._rates_cache
+        rates = await asyncio.to_thread(self._load_cached_rates)
+        if rates is not None:
+            return rates
+        
+        # If cache is invalid or doesn't exist, fetch from API
+        try:
+            session = self._get_aio_session()
+            async with session.get(
+                EXCHANGE_RATE_API,
+                headers=self._revalidation_headers(),
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                etag = response.headers.get('ETag', self._rates_etag)
+                last_modified = response.headers.get('Last-Modified', self._rates_last_modified)
+                
+                if response.status == 304 and self._rates_cache:
+                    # Rates unchanged; keep them and restart the expiry window
+                    await asyncio.to_thread(self._save_rates, self._rates_cache, etag, last_modified)
+                    return self._rates_cache
+                if response.status == 200:
+                    data = await response.json()
+                    rates = data.get('rates', {})
+                    await asyncio.to_thread(self._save_rates, rates, etag, last_modified)
+                    return rates
+                    
+        except Exception as e:
+            print(f"Error fetching exchange rates: {e}")
+            
+        # Fallback to some default rates if API fails
+        return FALLBACK_EXCHANGE_RATES
     
     def convert_currency(self, amount: float, from_currency: str, to_currency: str = 'INR') -> float:
         """
@@ -277,19 +459,21 @@ Please provide a detailed budget breakdown in the following JSON format:
         Returns:
             Converted amount in target currency
         """
-        if from_currency.upper() == to_currency.upper():
+        from_currency = from_currency.upper()
+        to_currency = to_currency.upper()
+        if from_currency == to_currency:
             return amount
             
         rates = self._get_exchange_rates()
         
         # If either currency is not in the rates, return the original amount
-        if from_currency.upper() not in rates or to_currency.upper() not in rates:
+        if from_currency not in rates or to_currency not in rates:
             print(f"Warning: Could not find exchange rate for {from_currency} or {to_currency}")
             return amount
             
         # Convert from source currency to INR, then to target currency
-        inr_amount = amount / rates[from_currency.upper()]
-        return inr_amount * rates[to_currency.upper()]
+        inr_amount = amount / rates[from_currency]
+        return inr_amount * rates[to_currency]
     
     def format_currency(self, amount: float, currency: str = 'INR') -> str:
         """
@@ -302,23 +486,7 @@ Please provide a detailed budget breakdown in the following JSON format:
         Returns:
             Formatted currency string
         """
-        currency_symbols = {
-            'USD': '$',
-            'EUR': '€',
-            'GBP': '£',
-            'JPY': '¥',
-            'AUD': 'A$',
-            'CAD': 'C$',
-            'INR': '₹'
-        }
-        
-        symbol = currency_symbols.get(currency.upper(), currency.upper())
-        
-        # Format with appropriate decimal places
-        if currency.upper() in ['JPY', 'INR']:
-            return f"{symbol}{amount:,.0f}"  # No decimal places for JPY and INR
-        else:
-            return f"{symbol}{amount:,.2f}"  # Two decimal places for others
+        return _format_currency(amount, currency.upper())
     
     async def estimate_budget(
         self,
@@ -347,24 +515,239 @@ Please provide a detailed budget breakdown in the following JSON format:
         """
         if travel_style is None:
             travel_style = ["leisure"]
+        
+        # Normalize once at entry; budget_level may be a raw string
+        level = self._normalize_budget_level(budget_level)
+        target_currency = target_currency.upper()
             
         # Create a cache key
-        cache_key = f"{destination}:{duration_days}:{budget_level.value}:{','.join(travel_style)}:{group_size}:{additional_notes}:{target_currency}"
+        cache_key = self._budget_cache_key(
+            destination, duration_days, level, travel_style,
+            group_size, additional_notes, target_currency
+        )
         
-        # Check cache first
-        if cache_key in self.budget_cache:
-            return self.budget_cache[cache_key]
-            
+        # Check cache first; concurrent identical requests share one LLM call
+        while (in_flight := self.budget_cache.get(cache_key)) is not None:
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                # The caller that owned the call was cancelled, not this one:
+                # look the key up again and, if nobody took over, make the call
+                task = asyncio.current_task()
+                if not in_flight.cancelled() or (task is not None and task.cancelling()):
+                    raise
+        
+        future = asyncio.get_running_loop().create_future()
+        self.budget_cache[cache_key] = future
+        try:
+            budget, cacheable = await self._request_budget(
+                destination, duration_days, level, travel_style,
+                group_size, additional_notes, target_currency
+            )
+        except Exception as e:
+            self.budget_cache.pop(cache_key, None)
+            future.set_exception(e)
+            future.exception()  # Don't warn when nobody else was waiting
+            raise
+        except BaseException:
+            # Cancellation (or interpreter exit) belongs to this caller only;
+            # waiters see the shared future cancelled and retry on their own
+            self.budget_cache.pop(cache_key, None)
+            future.cancel()
+            raise
+        
+        # Only LLM estimates are cached; fallbacks are retried next time
+        if not cacheable:
+            self.budget_cache.pop(cache_key, None)
+        future.set_result(budget)
+        return budget
+    
+    async def estimate_budget_stream(
+        self,
+        destination: str,
+        duration_days: int,
+        budget_level: Union[BudgetLevel, str],
+        travel_style: List[str],
+        group_size: int = 1,
+        additional_notes: str = "",
+        target_currency: str = "INR"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a travel budget estimate as the LLM produces it.
+        
+        Takes the same arguments as ``estimate_budget``. Partial results are the
+        JSON parsed so far (still in INR, and possibly missing categories), so a
+        UI can start rendering the breakdown early. The last item yielded is
+        always the complete budget, validated and converted to
+        ``target_currency`` exactly like ``estimate_budget`` would return it.
+        
+        Yields:
+            Partial budget dictionaries, followed by the final budget
+        """
+        if travel_style is None:
+            travel_style = ["leisure"]
+        
+        level = self._normalize_budget_level(budget_level)
+        target_currency = target_currency.upper()
+        
+        cache_key = self._budget_cache_key(
+            destination, duration_days, level, travel_style,
+            group_size, additional_notes, target_currency
+        )
+        
+        # A cached (or in-flight) estimate is already complete; yield it as is
+        in_flight = self.budget_cache.get(cache_key)
+        if in_flight is not None:
+            yield await asyncio.shield(in_flight)
+            return
+        
+        response: Union[Dict[str, Any], Exception, None] = None
+        stream = self.chain.astream(self._format_budget_input(
+            destination, duration_days, level, travel_style,
+            group_size, additional_notes
+        ))
+        deadline = asyncio.get_running_loop().time() + BUDGET_LLM_TIMEOUT
+        try:
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                chunk = await asyncio.wait_for(stream.__anext__(), timeout=max(remaining, 0))
+                if isinstance(chunk, dict):
+                    response = chunk
+                    yield chunk
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            response = e
+        finally:
+            await stream.aclose()
+        
+        if response is None:
+            response = ValueError("LLM returned an empty budget response")
+        budget, cacheable = await self._process_budget_response(
+            response, destination, duration_days, level, group_size, target_currency
+        )
+        
+        # Share the finished estimate with estimate_budget callers
+        if cacheable and cache_key not in self.budget_cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(budget)
+            self.budget_cache[cache_key] = future
+        yield budget
+    
+    @staticmethod
+    def _budget_cache_key(
+        destination: str,
+        duration_days: int,
+        budget_level: BudgetLevel,
+        travel_style: List[str],
+        group_size: int,
+        additional_notes: str,
+        target_currency: str
+    ) -> tuple:
+        """Build the budget_cache key; a plain tuple hashes without building a string."""
+        return (
+            destination, duration_days, budget_level.value, tuple(sorted(travel_style)),
+            group_size, additional_notes, target_currency
+        )
+    
+    @staticmethod
+    def _normalize_budget_level(budget_level: Union[BudgetLevel, str]) -> BudgetLevel:
+        """Convert a budget level string to a BudgetLevel, defaulting to mid-range."""
+        if isinstance(budget_level, BudgetLevel):
+            return budget_level
+        try:
+            return BudgetLevel(str(budget_level).lower())
+        except ValueError:
+            return BudgetLevel.MID_RANGE
+    
+    def _format_budget_input(
+        self,
+        destination: str,
+        duration_days: int,
+        budget_level: BudgetLevel,
+        travel_style: List[str],
+        group_size: int,
+        additional_notes: str
+    ) -> Dict[str, Any]:
+        """Build the prompt variables for the budget chain."""
+        return {
+            "destination": destination,
+            "duration_days": duration_days,
+            "budget_level": budget_level.value,
+            "travel_style": ", ".join(travel_style),
+            "group_size": group_size,
+            "additional_notes": additional_notes
+        }
+    
+    async def _request_budget(
+        self,
+        destination: str,
+        duration_days: int,
+        budget_level: BudgetLevel,
+        travel_style: List[str],
+        group_size: int,
+        additional_notes: str,
+        target_currency: str
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Ask the LLM for a budget estimate, falling back to the default budget.
+        
+        Returns:
+            Tuple of the budget and whether it came from the LLM (and may be cached)
+        """
+        # Building the default budget is cheap, but converting it needs the
+        # exchange rates; fetch those while the LLM is working so a failure
+        # or timeout doesn't add their latency on top
+        default_task = None
+        if target_currency != 'INR':
+            default_task = asyncio.create_task(self._convert_budget_currency(
+                self._get_default_budget(destination, duration_days, budget_level, group_size),
+                'INR', target_currency
+            ))
         try:
             # Get the LLM response
-            response = await self.chain.ainvoke({
-                "destination": destination,
-                "duration_days": duration_days,
-                "budget_level": budget_level.value,
-                "travel_style": ", ".join(travel_style),
-                "group_size": group_size,
-                "additional_notes": additional_notes
-            })
+            response = await asyncio.wait_for(
+                self.chain.ainvoke(self._format_budget_input(
+                    destination, duration_days, budget_level, travel_style,
+                    group_size, additional_notes
+                )),
+                timeout=BUDGET_LLM_TIMEOUT
+            )
+        except Exception as e:
+            response = e
+        
+        try:
+            return await self._process_budget_response(
+                response, destination, duration_days, budget_level, group_size,
+                target_currency, default_task
+            )
+        finally:
+            if default_task is not None:
+                default_task.cancel()
+    
+    async def _process_budget_response(
+        self,
+        response: Union[Dict[str, Any], Exception],
+        destination: str,
+        duration_days: int,
+        budget_level: BudgetLevel,
+        group_size: int,
+        target_currency: str,
+        default_task: Optional["asyncio.Task[Dict[str, Any]]"] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Validate an LLM budget response, falling back to the default budget.
+        
+        Args:
+            response: Parsed LLM response, or the exception raised while getting it
+            default_task: Already running default-budget computation to fall back on
+            
+        Returns:
+            Tuple of the budget and whether it came from the LLM (and may be cached)
+        """
+        try:
+            if isinstance(response, Exception):
+                raise response
             
             # Process and validate the response
             if isinstance(response, dict) and "budget_breakdown" in response:
@@ -375,7 +758,11 @@ Please provide a detailed budget breakdown in the following JSON format:
                 for category in required_categories:
                     if category not in breakdown:
                         # Fall back to default values if any category is missing
-                        return self._get_default_budget(destination, duration_days, budget_level, group_size)
+                        budget = await self._fallback_budget(
+                            destination, duration_days, budget_level, group_size,
+                            target_currency, default_task
+                        )
+                        return budget, False
                 
                 # Calculate total from breakdown
                 total = sum(
@@ -387,24 +774,83 @@ Please provide a detailed budget breakdown in the following JSON format:
                 response["total_estimated_cost"] = response.get("total_estimated_cost", total)
                 
                 # Convert currency if needed
-                if target_currency.upper() != 'INR':
+                if target_currency != 'INR':
                     response = await self._convert_budget_currency(response, 'INR', target_currency)
                 
-                # Cache the result
-                self.budget_cache[cache_key] = response
-                
-                return response
+                return response, True
+            
+            raise ValueError("LLM response is missing 'budget_breakdown'")
                 
         except Exception as e:
             print(f"Error estimating budget: {e}")
             # Fall back to default budget calculation
-            budget = await self._get_default_budget(destination, duration_days, budget_level, group_size, target_currency)
+            # (already converted to the target currency)
+            budget = await self._fallback_budget(
+                destination, duration_days, budget_level, group_size,
+                target_currency, default_task
+            )
+            return budget, False
+    
+    async def _fallback_budget(
+        self,
+        destination: str,
+        duration_days: int,
+        budget_level: BudgetLevel,
+        group_size: int,
+        target_currency: str,
+        default_task: Optional["asyncio.Task[Dict[str, Any]]"] = None
+    ) -> Dict[str, Any]:
+        """Return the default budget, reusing a precomputed one when available."""
+        if default_task is not None:
+            return await asyncio.shield(default_task)
+        budget = self._get_default_budget(destination, duration_days, budget_level, group_size)
+        if target_currency != 'INR':
+            budget = await self._convert_budget_currency(budget, 'INR', target_currency)
+        return budget
+    
+    async def estimate_budgets_bulk(
+        self,
+        inputs: List[Dict[str, Any]],
+        target_currency: str = "INR"
+    ) -> List[Dict[str, Any]]:
+        """
+        Estimate budgets for several trips with one batched LLM call.
+        
+        Args:
+            inputs: List of dictionaries with the same keys as ``estimate_budget``'s
+                arguments (destination, duration_days, budget_level, travel_style,
+                group_size, additional_notes)
+            target_currency: Currency to use for all budgets (default: 'INR')
             
-            # Convert currency if needed
-            if target_currency.upper() != 'INR':
-                budget = await self._convert_budget_currency(budget, 'INR', target_currency)
-                
-            return budget
+        Returns:
+            List of budget dictionaries in the same order as ``inputs``
+        """
+        target_currency = target_currency.upper()
+        params = []
+        for item in inputs:
+            params.append({
+                "destination": item.get("destination", ""),
+                "duration_days": item.get("duration_days", 1),
+                "budget_level": self._normalize_budget_level(item.get("budget_level", BudgetLevel.MID_RANGE)),
+                "travel_style": item.get("travel_style") or ["leisure"],
+                "group_size": item.get("group_size", 1),
+                "additional_notes": item.get("additional_notes", "")
+            })
+        
+        responses = await self.chain.abatch(
+            [self._format_budget_input(**p) for p in params],
+            config={"max_concurrency": 10},
+            return_exceptions=True
+        )
+        
+        results = await asyncio.gather(*(
+            self._process_budget_response(
+                response, p["destination"], p["duration_days"], p["budget_level"],
+                p["group_size"], target_currency
+            )
+            for response, p in zip(responses, params)
+        ))
+        return [budget for budget, _ in results]
     
     async def _convert_budget_currency(
         self,
@@ -423,64 +869,81 @@ Please provide a detailed budget breakdown in the following JSON format:
         Returns:
             Budget with all monetary values converted to the target currency
         """
-        if from_currency.upper() == to_currency.upper():
+        from_currency = from_currency.upper()
+        to_currency = to_currency.upper()
+        if from_currency == to_currency:
             return budget
+        
+        # The currencies are fixed for the whole budget, so look the rates up once
+        rates = await self._get_exchange_rates_async()
+        if from_currency not in rates or to_currency not in rates:
+            print(f"Warning: Could not find exchange rate for {from_currency} or {to_currency}")
+            factor = 1.0
+        else:
+            factor = rates[to_currency] / rates[from_currency]
             
         # Convert total estimated cost
         if 'total_estimated_cost' in budget:
-            budget['total_estimated_cost'] = self.convert_currency(
-                budget['total_estimated_cost'], from_currency, to_currency
-            )
+            budget['total_estimated_cost'] = budget['total_estimated_cost'] * factor
         
         # Convert all amounts in the budget breakdown
         if 'budget_breakdown' in budget:
             for category, details in budget['budget_breakdown'].items():
                 if 'daily_estimate' in details:
-                    details['daily_estimate'] = self.convert_currency(
-                        details['daily_estimate'], from_currency, to_currency
-                    )
+                    details['daily_estimate'] = details['daily_estimate'] * factor
                 if 'total_estimate' in details:
-                    details['total_estimate'] = self.convert_currency(
-                        details['total_estimate'], from_currency, to_currency
-                    )
+                    details['total_estimate'] = details['total_estimate'] * factor
                 
                 # Update notes to reflect currency conversion
                 if 'notes' in details and 'converted from' not in details['notes'].lower():
                     details['notes'] = f"{details['notes']} (converted from {from_currency} to {to_currency})"
         
         # Update the currency in the budget
-        budget['currency'] = to_currency.upper()
+        budget['currency'] = to_currency
         
         return budget
         
-    async def _get_default_budget(
+    def _get_default_budget(
         self,
         destination: str,
         duration_days: int,
         budget_level: BudgetLevel = BudgetLevel.MID_RANGE,
-        group_size: int = 1,
-        target_currency: str = 'INR'
+        group_size: int = 1
     ) -> Dict[str, Any]:
         """
-        Generate a default budget based on the budget level and duration.
+        Generate a default budget in INR based on the budget level and duration.
         
         Args:
             destination: Travel destination (not used in default calculation)
             duration_days: Number of days for the trip
             budget_level: Budget level (budget/mid-range/luxury)
             group_size: Number of people traveling
-            target_currency: Currency to use for the budget (default: 'INR')
             
         Returns:
-            Dictionary containing the default budget breakdown
+            Dictionary containing the default budget breakdown in INR; callers
+            convert it with ``_convert_budget_currency`` when needed
         """
         # Get the default daily budgets for the specified budget level (in INR)
-        daily_budgets = self.DEFAULT_DAILY_BUDGETS.get(budget_level, self.DEFAULT_DAILY_BUDGETS[BudgetLevel.MID_RANGE])
+        if budget_level not in self.DEFAULT_DAILY_BUDGETS:
+            budget_level = BudgetLevel.MID_RANGE
+        daily_budgets = self.DEFAULT_DAILY_BUDGETS[budget_level]
+        daily_total = self.DEFAULT_DAILY_TOTALS[budget_level]
         
         # Calculate total for each category
-        # Convert to target currency if needed
-        if target_currency.upper() != 'INR':
-            budget = await self._convert_budget_currency(budget, 'INR', target_currency)
+        budget = {
+            "budget_breakdown": {
+                category: {
+                    "daily_estimate": amount * group_size,
+                    "total_estimate": amount * group_size * duration_days,
+                    "notes": f"Default {budget_level.value} estimate"
+                }
+                for category, amount in daily_budgets.items()
+            },
+            "total_estimated_cost": daily_total * group_size * duration_days,
+            "budget_level": budget_level.value,
+            "currency": "INR",
+            "recommendations": []
+        }
             
         return budget
     
@@ -506,33 +969,13 @@ Please provide a detailed budget breakdown in the following JSON format:
                 "recommendations": []
             }
         
-        total_cost = 0.0
-        breakdown = []
-        
-        for leg in transport_plan:
-            if not leg.get("options"):
-                continue
-                
-            # Get the recommended option or the first one available
-            recommended_mode = leg.get("recommended_mode")
-            option = next(
-                (opt for opt in leg["options"] if opt.mode == recommended_mode),
-                leg["options"][0]
-            )
-            
-            # Calculate cost for the group
-            leg_cost = option.cost * group_size
-            total_cost += leg_cost
-            
-            breakdown.append({
-                "from": leg.get("from", ""),
-                "to": leg.get("to", ""),
-                "mode": option.mode,
-                "cost_per_person": option.cost,
-                "total_cost": leg_cost,
-                "duration_minutes": option.duration,
-                "provider": option.provider or "N/A"
-            })
+        # Build the breakdown in one pass so the list is sized up front
+        breakdown = [
+            self._leg_breakdown(leg, group_size)
+            for leg in transport_plan
+            if leg.get("options")
+        ]
+        total_cost = sum((item["total_cost"] for item in breakdown), 0.0)
         
         # Generate recommendations based on transport choices
         recommendations = [
@@ -546,6 +989,25 @@ Please provide a detailed budget breakdown in the following JSON format:
             "recommendations": recommendations
         }
     
+    @staticmethod
+    def _leg_breakdown(leg: Dict[str, Any], group_size: int) -> Dict[str, Any]:
+        """Cost one transport leg for the group using its recommended option."""
+        # Get the recommended option or the first one available
+        options = leg["options"]
+        by_mode = {opt.mode: opt for opt in reversed(options)}  # First option wins per mode
+        option = by_mode.get(leg.get("recommended_mode"), options[0])
+        cost = option.cost
+        
+        return {
+            "from": leg.get("from", ""),
+            "to": leg.get("to", ""),
+            "mode": option.mode,
+            "cost_per_person": cost,
+            "total_cost": cost * group_size,
+            "duration_minutes": option.duration,
+            "provider": option.provider or "N/A"
+        }
+    
     async def calculate_accommodation_costs(
         self,
         destination: str,
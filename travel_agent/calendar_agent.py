@@ -1,121 +1,28 @@
 """Calendar Agent for managing and visualizing travel plans."""
 from typing import Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime, date, time, timedelta
+import asyncio
+import hashlib
 import json
+import os
+from functools import cache, partial
 from pathlib import Path
 import webbrowser
 import tempfile
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
 
 from .models import TravelItinerary, Activity, DailyItinerary
 from .base import BaseAgent
 
-class CalendarAgent(BaseAgent):
-    """Agent responsible for managing and visualizing travel plans in a calendar format."""
-    
-    def __init__(self, model_name: str = None, temperature: float = 0.3, templates_dir: str = "templates"):
-        """
-        Initialize the CalendarAgent.
-        
-        Args:
-            model_name: Name of the LLM model (unused, for API compatibility)
-            temperature: Temperature for model generation (unused, for API compatibility)
-            templates_dir: Directory containing HTML templates
-        """
-        self.templates_dir = Path(templates_dir)
-        self.templates_dir.mkdir(parents=True, exist_ok=True)
-        self.model_name = model_name
-        self.temperature = temperature
-        
-        # Initialize Jinja2 environment
-        self.env = Environment(loader=FileSystemLoader(str(self.templates_dir)))
-        
-        # Create default template if it doesn't exist
-        self._ensure_default_template()
-    
-    async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process the calendar generation request.
-        
-        Args:
-            input_data: Dictionary containing:
-                - itinerary: TravelItinerary object or list of DailyItinerary
-                - output_format: Desired output format (e.g., 'html', 'json')
-                - open_in_browser: Whether to open the result in a web browser (for HTML)
-                
-        Returns:
-            Dictionary containing the calendar data or path to the generated file
-        """
-        try:
-            itinerary = input_data.get("itinerary")
-            output_format = input_data.get("output_format", "html")
-            open_in_browser = input_data.get("open_in_browser", True)
-            
-            if not itinerary:
-                return {
-                    "status": "error",
-                    "error": "No itinerary provided for calendar generation"
-                }
-            
-            # Handle different input types
-            if isinstance(itinerary, list):
-                # Convert list of DailyItinerary to TravelItinerary
-                if not all(isinstance(day, (DailyItinerary, dict)) for day in itinerary):
-                    return {
-                        "status": "error",
-                        "error": "Invalid itinerary format. Expected List[DailyItinerary] or TravelItinerary"
-                    }
-                
-                # Create a temporary TravelItinerary if we have a list
-                temp_itinerary = TravelItinerary(
-                    destination="Multiple Destinations",
-                    duration_days=len(itinerary),
-                    daily_plans=itinerary
-                )
-                itinerary = temp_itinerary
-            
-            # Generate the calendar based on the requested format
-            if output_format.lower() == "html":
-                result = await self.generate_html_calendar(itinerary, open_in_browser)
-            elif output_format.lower() == "json":
-                result = await self.generate_json_calendar(itinerary)
-            else:
-                return {
-                    "status": "error",
-                    "error": f"Unsupported output format: {output_format}. Supported formats: html, json"
-                }
-            
-            return {
-                "status": "success",
-                "format": output_format,
-                "data": result,
-                "metadata": {
-                    "model": self.model_name,
-                    "timestamp": str(datetime.now().isoformat())
-                }
-            }
-            
-        except Exception as e:
-            return {
-                "status": "error",
-                "error": f"Failed to generate calendar: {str(e)}",
-                "metadata": {
-                    "model": self.model_name,
-                    "timestamp": str(datetime.now().isoformat())
-                }
-            }
-    
-    def _ensure_default_template(self) -> None:
-        """Ensure the default calendar template exists."""
-        template_path = self.templates_dir / "calendar_template.html"
-        if not template_path.exists():
-            template_path.write_text("""
+# Written to the templates directory when no calendar template exists yet
+_DEFAULT_CALENDAR_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Travel Itinerary: {{ itinerary.destination }}</title>
+    <title>Travel Itinerary: {{ itinerary.destination|e }}</title>
     <style>
         body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
@@ -262,10 +169,10 @@ class CalendarAgent(BaseAgent):
 </head>
 <body>
     <div class="header">
-        <h1>{{ itinerary.destination }} Itinerary</h1>
+        <h1>{{ itinerary.destination|e }} Itinerary</h1>
         <div class="trip-dates">
-            {{ itinerary.start_date.strftime('%B %d, %Y') }} - {{ itinerary.end_date.strftime('%B %d, %Y') }}
-            ({{ (itinerary.end_date - itinerary.start_date).days + 1 }} days)
+            {{ start_fmt }} - {{ end_fmt }}
+            ({{ duration }} days)
         </div>
     </div>
 
@@ -273,18 +180,18 @@ class CalendarAgent(BaseAgent):
         <h2>Trip Summary</h2>
         <div class="summary-item">
             <div class="summary-label">Destination:</div>
-            <div class="summary-value">{{ itinerary.destination }}</div>
+            <div class="summary-value">{{ itinerary.destination|e }}</div>
         </div>
         <div class="summary-item">
             <div class="summary-label">Travel Dates:</div>
             <div class="summary-value">
-                {{ itinerary.start_date.strftime('%A, %B %d, %Y') }} to {{ itinerary.end_date.strftime('%A, %B %d, %Y') }}
+                {{ start_long }} to {{ end_long }}
             </div>
         </div>
         <div class="summary-item">
             <div class="summary-label">Duration:</div>
             <div class="summary-value">
-                {{ (itinerary.end_date - itinerary.start_date).days + 1 }} days
+                {{ duration }} days
             </div>
         </div>
         {% if itinerary.travel_style %}
@@ -299,29 +206,29 @@ class CalendarAgent(BaseAgent):
 
     <h2>Daily Itinerary</h2>
     <div class="calendar">
-        {% for day in itinerary.daily_plans %}
+        {% for day_num, date_fmt, activities in days %}
         <div class="day-card">
             <div class="day-header">
-                <span class="day-name">Day {{ day.day }}</span>
-                <span class="day-number">{{ day.date.strftime('%a, %b %d') }}</span>
+                <span class="day-name">Day {{ day_num }}</span>
+                <span class="day-number">{{ date_fmt }}</span>
             </div>
             <div class="activities">
-                {% if day.activities %}
-                    {% for activity in day.activities %}
+                {% if activities %}
+                    {% for start_time, end_time, name, location, description, notes in activities %}
                     <div class="activity">
                         <div class="time">
-                            <span>{{ activity.start_time }}</span>
-                            <span>{% if activity.end_time %}{{ activity.end_time }}{% endif %}</span>
+                            <span>{{ start_time|e }}</span>
+                            <span>{{ end_time|e }}</span>
                         </div>
-                        <div class="activity-title">{{ activity.name }}</div>
-                        {% if activity.location %}
-                        <div class="activity-location">📍 {{ activity.location }}</div>
+                        <div class="activity-title">{{ name|e }}</div>
+                        {% if location %}
+                        <div class="activity-location">📍 {{ location|e }}</div>
                         {% endif %}
-                        {% if activity.description %}
-                        <div class="activity-description">{{ activity.description }}</div>
+                        {% if description %}
+                        <div class="activity-description">{{ description|e }}</div>
                         {% endif %}
-                        {% if activity.notes %}
-                        <div class="activity-notes">📝 {{ activity.notes }}</div>
+                        {% if notes %}
+                        <div class="activity-notes">📝 {{ notes|e }}</div>
                         {% endif %}
                     </div>
                     {% endfor %}
@@ -334,11 +241,252 @@ class CalendarAgent(BaseAgent):
     </div>
 
     <div class="no-print" style="margin-top: 40px; text-align: center; padding: 20px 0; color: #7f8c8d; font-size: 0.9em;">
-        <p>Generated on {{ now.strftime('%B %d, %Y at %I:%M %p') }} | Agentic Travel Planner</p>
+        <p>Generated on {{ now_fmt }} | Agentic Travel Planner</p>
         <button onclick="window.print()" style=\"padding: 8px 16px; background-color: #3498db; color: white; border: none; border-radius: 4px; cursor: pointer; margin-top: 10px;\">
             Print Itinerary
         </button>
     </div>
 </body>
 </html>
-""")
+"""
+
+@cache
+def _ensure_default_template_on_disk(templates_dir: Path) -> None:
+    """Create the templates directory and default calendar template once per process."""
+    templates_dir.mkdir(parents=True, exist_ok=True)
+    template_path = templates_dir / "calendar_template.html"
+    if not template_path.exists():
+        template_path.write_text(_DEFAULT_CALENDAR_TEMPLATE)
+
+def _activity_row(activity: Union[Activity, Dict[str, Any]]) -> Tuple[str, str, str, str, str, str]:
+    """Flatten an activity (model or dict) into the calendar template's row tuple."""
+    get = activity.get if isinstance(activity, dict) else partial(getattr, activity)
+    return (
+        get("start_time", "") or "",
+        get("end_time", "") or "",
+        get("name", "") or "",
+        get("location", "") or "",
+        get("description", "") or "",
+        get("notes", "") or ""
+    )
+
+# Rendered calendar pages, kept in a per-user directory so other local users
+# can't plant or read them (the shared temp directory allows both)
+CALENDAR_CACHE_DIR = Path.home() / ".cache" / "roameo" / "calendars"
+
+# Jinja2 environments shared by all agents, keyed by templates directory
+_ENVIRONMENTS: Dict[Path, Environment] = {}
+
+def _get_env(templates_dir: Path) -> Environment:
+    """Get the shared Jinja2 environment for a templates directory, creating it once."""
+    key = templates_dir.resolve()
+    env = _ENVIRONMENTS.get(key)
+    if env is None:
+        # Templates don't change while running, so skip the per-render mtime
+        # check and keep compiled bytecode on disk (in the temp directory, like
+        # the web app). Autoescaping stays off: the calendar template escapes
+        # its free-text fields explicitly
+        env = _ENVIRONMENTS.setdefault(key, Environment(
+            loader=FileSystemLoader(str(templates_dir)),
+            auto_reload=False,
+            autoescape=False,
+            bytecode_cache=FileSystemBytecodeCache()
+        ))
+    return env
+
+class CalendarAgent(BaseAgent):
+    """Agent responsible for managing and visualizing travel plans in a calendar format."""
+    
+    def __init__(self, model_name: str = None, temperature: float = 0.3, templates_dir: str = "templates"):
+        """
+        Initialize the CalendarAgent.
+        
+        Args:
+            model_name: Name of the LLM model (unused, for API compatibility)
+            temperature: Temperature for model generation (unused, for API compatibility)
+            templates_dir: Directory containing HTML templates
+        """
+        self.templates_dir = Path(templates_dir)
+        self.model_name = model_name
+        self.temperature = temperature
+        
+        # Create default template if it doesn't exist
+        self._ensure_default_template()
+        
+        # Share one Jinja2 environment (and its template cache) per directory
+        self.env = _get_env(self.templates_dir)
+        
+        # Compile the calendar template once and reuse it for every render
+        self._template = self.env.get_template("calendar_template.html")
+    
+    async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Process the calendar generation request.
+        
+        Args:
+            input_data: Dictionary containing:
+                - itinerary: TravelItinerary object or list of DailyItinerary
+                - output_format: Desired output format (e.g., 'html', 'json')
+                - open_in_browser: Whether to open the result in a web browser (for HTML)
+                
+        Returns:
+            Dictionary containing the calendar data or path to the generated file
+        """
+        now_iso = datetime.now().isoformat()
+        try:
+            itinerary = input_data.get("itinerary")
+            output_format = input_data.get("output_format", "html")
+            open_in_browser = input_data.get("open_in_browser", True)
+            
+            if not itinerary:
+                return {
+                    "status": "error",
+                    "error": "No itinerary provided for calendar generation"
+                }
+            
+            # Handle different input types
+            if isinstance(itinerary, list):
+                # Convert list of DailyItinerary to TravelItinerary
+                if not all(isinstance(day, (DailyItinerary, dict)) for day in itinerary):
+                    return {
+                        "status": "error",
+                        "error": "Invalid itinerary format. Expected List[DailyItinerary] or TravelItinerary"
+                    }
+                
+                # Create a temporary TravelItinerary if we have a list; the
+                # trip starts on the earliest dated day, or today if none are
+                dates = [day.date for day in itinerary if isinstance(day, DailyItinerary) and day.date]
+                start_date = min(dates) if dates else date.today()
+                fields = {
+                    "destination": "Multiple Destinations",
+                    "start_date": start_date,
+                    "end_date": start_date + timedelta(days=max(len(itinerary) - 1, 0)),
+                    "duration_days": len(itinerary),
+                    "daily_plans": itinerary
+                }
+                
+                # Days that are already DailyItinerary models were validated when
+                # they were built, so skip re-validating every nested activity
+                if all(isinstance(day, DailyItinerary) for day in itinerary):
+                    itinerary = TravelItinerary.model_construct(**fields)
+                else:
+                    itinerary = TravelItinerary(**fields)
+            
+            # Generate the calendar based on the requested format
+            if output_format.lower() == "html":
+                result = await self.generate_html_calendar(itinerary, open_in_browser)
+            elif output_format.lower() == "json":
+                result = await self.generate_json_calendar(itinerary)
+            else:
+                return {
+                    "status": "error",
+                    "error": f"Unsupported output format: {output_format}. Supported formats: html, json"
+                }
+            
+            return {
+                "status": "success",
+                "format": output_format,
+                "data": result,
+                "metadata": {
+                    "model": self.model_name,
+                    "timestamp": now_iso
+                }
+            }
+            
+        except Exception as e:
+            return {
+                "status": "error",
+                "error": f"Failed to generate calendar: {str(e)}",
+                "metadata": {
+                    "model": self.model_name,
+                    "timestamp": now_iso
+                }
+            }
+    
+    async def generate_html_calendar(
+        self,
+        itinerary: TravelItinerary,
+        open_in_browser: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Render the itinerary as an HTML calendar page.
+        
+        Args:
+            itinerary: Itinerary to render
+            open_in_browser: Whether to open the generated page in a web browser
+            
+        Returns:
+            Dictionary with the path of the generated HTML file
+        """
+        # Rendering, file I/O and launching the browser all block, so keep
+        # them off the event loop
+        file_path = await asyncio.to_thread(self._write_html_calendar, itinerary)
+        
+        if open_in_browser:
+            await asyncio.to_thread(webbrowser.open, file_path.as_uri())
+        
+        return {
+            "file_path": str(file_path),
+            "opened_in_browser": open_in_browser
+        }
+    
+    def _write_html_calendar(self, itinerary: TravelItinerary) -> Path:
+        """Render the itinerary to an HTML file (blocking) and return its path."""
+        # Name the page after the itinerary so identical itineraries reuse it;
+        # the day is part of the name so the "Generated on" line stays current
+        key = hashlib.blake2b(
+            json.dumps(itinerary.model_dump(mode="json"), sort_keys=True).encode("utf-8"),
+            digest_size=8
+        ).hexdigest()
+        CALENDAR_CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        file_path = CALENDAR_CACHE_DIR / f"roameo_{date.today().isoformat()}_{key}.html"
+        
+        if not file_path.exists():
+            # Stream the page straight to disk instead of building it as one
+            # string, then move it into place so a partial page is never reused
+            with tempfile.NamedTemporaryFile(
+                mode="wb", suffix=".html", prefix="itinerary_", dir=file_path.parent, delete=False
+            ) as f:
+                self._template.stream(self._calendar_context(itinerary)).dump(f, encoding="utf-8")
+            os.replace(f.name, file_path)
+        
+        return file_path
+    
+    @staticmethod
+    def _calendar_context(itinerary: TravelItinerary) -> Dict[str, Any]:
+        """Build the template context with every date formatted up front."""
+        start_date, end_date = itinerary.start_date, itinerary.end_date
+        return {
+            "itinerary": itinerary,
+            "start_fmt": start_date.strftime('%B %d, %Y'),
+            "end_fmt": end_date.strftime('%B %d, %Y'),
+            "start_long": start_date.strftime('%A, %B %d, %Y'),
+            "end_long": end_date.strftime('%A, %B %d, %Y'),
+            "duration": (end_date - start_date).days + 1,
+            # One flat tuple per day and per activity, unpacked positionally by
+            # the template instead of resolving attributes cell by cell
+            "days": [
+                (
+                    day.day,
+                    day.date.strftime('%a, %b %d') if day.date else "",
+                    [_activity_row(activity) for activity in day.activities]
+                )
+                for day in itinerary.daily_plans
+            ],
+            "now_fmt": datetime.now().strftime('%B %d, %Y at %I:%M %p')
+        }
+    
+    async def generate_json_calendar(self, itinerary: TravelItinerary) -> Dict[str, Any]:
+        """
+        Convert the itinerary into a JSON-serializable calendar.
+        
+        Args:
+            itinerary: Itinerary to convert
+            
+        Returns:
+            Dictionary representation of the itinerary
+        """
+        return itinerary.model_dump(mode="json")
+    
+    def _ensure_default_template(self) -> None:
+        """Ensure the default calendar template exists."""
+        _ensure_default_template_on_disk(self.templates_dir.resolve())
@@ -1,51 +1,98 @@
 """Command-line interface for the Agentic Travel Planner."""
+import argparse
 import asyncio
+import hashlib
 import json
+import sys
+import time
 from datetime import datetime
-from typing import Dict, Any
+from functools import partial
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
 
+from .settings import get_settings
+from .utils import ModelConfig, fastjson
 from .workflow import travel_planner_workflow
 
+# Only color output going to a terminal; pipes and files get plain text
+_USE_COLOR = sys.stdout is not None and sys.stdout.isatty()
+
+def _ansi(code: str) -> str:
+    """Return an ANSI escape code, or an empty string when color is disabled."""
+    return code if _USE_COLOR else ''
+
 # ANSI color codes for console output
+HEADER = _ansi('\033[95m')
+BLUE = _ansi('\033[94m')
+CYAN = _ansi('\033[96m')
+GREEN = _ansi('\033[92m')
+WARNING = _ansi('\033[93m')
+FAIL = _ansi('\033[91m')
+ENDC = _ansi('\033[0m')
+BOLD = _ansi('\033[1m')
+UNDERLINE = _ansi('\033[4m')
+
 COLORS = {
-    'HEADER': '\033[95m',
-    'BLUE': '\033[94m',
-    'CYAN': '\033[96m',
-    'GREEN': '\033[92m',
-    'WARNING': '\033[93m',
-    'FAIL': '\033[91m',
-    'ENDC': '\033[0m',
-    'BOLD': '\033[1m',
-    'UNDERLINE': '\033[4m'
+    'HEADER': HEADER,
+    'BLUE': BLUE,
+    'CYAN': CYAN,
+    'GREEN': GREEN,
+    'WARNING': WARNING,
+    'FAIL': FAIL,
+    'ENDC': ENDC,
+    'BOLD': BOLD,
+    'UNDERLINE': UNDERLINE
 }
 
+# Finished plans are cached here, keyed by the request, so repeats skip the LLM
+RESULT_CACHE_DIR = Path.home() / ".cache" / "roameo"
+# Plans mention relative dates ("next weekend"), so they go stale within a day
+RESULT_CACHE_TTL = 24 * 60 * 60
+
+# Prefixes combined once so the print helpers need no lookups or concatenation
+_HEADER_PREFIX = HEADER + BOLD
+_SECTION_PREFIX = BLUE + BOLD + "=== "
+_SUCCESS_PREFIX = GREEN + "✓ "
+_WARNING_PREFIX = WARNING + "⚠️  "
+_ERROR_PREFIX = FAIL + "✗ "
+_INFO_PREFIX = CYAN + "ℹ️  "
+
 def print_header():
     """Print the application header."""
-    print(f"{COLORS['HEADER']}{COLORS['BOLD']}")
-    print("=" * 60)
-    print("AGENTIC TRAVEL PLANNER".center(60))
-    print("=" * 60)
-    print(f"{COLORS['ENDC']}")
+    rule = "=" * 60
+    sys.stdout.write(
+        f"{_HEADER_PREFIX}\n"
+        f"{rule}\n"
+        f"{'AGENTIC TRAVEL PLANNER'.center(60)}\n"
+        f"{rule}\n"
+        f"{ENDC}\n"
+    )
 
 def print_section(title: str):
     """Print a section header."""
-    print(f"\n{COLORS['BLUE']}{COLORS['BOLD']}=== {title.upper()} ==={COLORS['ENDC']}")
+    sys.stdout.write(f"\n{_SECTION_PREFIX}{title.upper()} ==={ENDC}\n")
 
 def print_success(message: str):
     """Print a success message."""
-    print(f"{COLORS['GREEN']}✓ {message}{COLORS['ENDC']}")
+    sys.stdout.write(f"{_SUCCESS_PREFIX}{message}{ENDC}\n")
 
 def print_warning(message: str):
     """Print a warning message."""
-    print(f"{COLORS['WARNING']}⚠️  {message}{COLORS['ENDC']}")
+    sys.stdout.write(f"{_WARNING_PREFIX}{message}{ENDC}\n")
 
 def print_error(message: str):
     """Print an error message."""
-    print(f"{COLORS['FAIL']}✗ {message}{COLORS['ENDC']}")
+    sys.stdout.write(f"{_ERROR_PREFIX}{message}{ENDC}\n")
 
 def print_info(message: str):
     """Print an info message."""
-    print(f"{COLORS['CYAN']}ℹ️  {message}{COLORS['ENDC']}")
+    sys.stdout.write(f"{_INFO_PREFIX}{message}{ENDC}\n")
+
+def read_line(prompt: str) -> str:
+    """Prompt for and read one line from stdin, stripped of surrounding whitespace."""
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    return sys.stdin.readline().strip()
 
 def format_duration(minutes: int) -> str:
     """Format duration in minutes to a human-readable string."""
@@ -55,6 +102,37 @@ def format_duration(minutes: int) -> str:
     mins = minutes % 60
     return f"{hours}h {mins}min"
 
+def _pretty_json(data: Any) -> str:
+    """Serialize data as indented JSON."""
+    return fastjson.dumps(data, indent=True).decode('utf-8')
+
+def _extract_activity(activity: Any) -> Optional[Tuple[Any, Any, Any, Any, Any]]:
+    """
+    Pull the display fields out of an activity.
+    
+    Args:
+        activity: Activity object (Pydantic model, dataclass, etc.) or dictionary
+        
+    Returns:
+        Tuple of (start_time, end_time, name, location, description), or None
+        if the activity is neither a dictionary nor has a start time
+    """
+    if isinstance(activity, dict):
+        get = activity.get
+    elif hasattr(activity, 'start_time'):
+        # Read plain objects through their __dict__; slotted ones need getattr
+        fields = getattr(activity, '__dict__', None)
+        get = fields.get if fields is not None else partial(getattr, activity)
+    else:
+        return None
+    return (
+        get('start_time', ''),
+        get('end_time', ''),
+        get('name', 'Unnamed Activity'),
+        get('location', ''),
+        get('description', '')
+    )
+
 async def get_output_format() -> str:
     """Prompt user to select an output format."""
     print("\n" + "-" * 60)
@@ -71,17 +149,64 @@ async def get_output_format() -> str:
         "4": "html"
     }
     
-    choice = input("\nEnter your choice (1-4, default is 1): ").strip()
+    choice = read_line("\nEnter your choice (1-4, default is 1): ")
     return format_map.get(choice, "markdown")
 
-async def run_travel_planner():
-    """Run the travel planner CLI."""
+def _result_cache_path(user_input: str, output_format: str) -> Path:
+    """Get the cache file for a trip description and output format.
+    
+    The model and settings are part of the key, so changing either one
+    doesn't serve plans made under the old configuration.
+    """
+    provider = ModelConfig.get_provider()
+    config = get_settings().model_dump_json(
+        exclude={"google_api_key", "groq_api_key", "tavily_api_key"}
+    )
+    key = hashlib.sha1(
+        f"{user_input}|{output_format}|{provider}|{ModelConfig.get_model_name(provider)}|{config}".encode("utf-8")
+    ).hexdigest()
+    return RESULT_CACHE_DIR / f"{key}.json"
+
+def _load_cached_result(path: Path) -> Optional[Dict[str, Any]]:
+    """Load a cached workflow result, or None if there isn't a fresh, usable one."""
+    try:
+        data = path.read_bytes()
+        cached = fastjson.loads(data)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print_warning(f"Ignoring unreadable result cache: {e}")
+        return None
+    if time.time() - cached.get("cached_at", 0) > RESULT_CACHE_TTL:
+        return None
+    return cached
+
+def _save_cached_result(path: Path, result: Dict[str, Any]) -> None:
+    """Cache the parts of a successful workflow result that the CLI displays."""
+    # Only the formatted output is cached; messages are reduced to their text
+    cached = {
+        "cached_at": time.time(),
+        "formatter_output": result["formatter_output"],
+        "messages": [getattr(msg, "content", msg) for msg in result.get("messages") or []]
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(fastjson.dumps(cached, default=str))
+    except Exception as e:
+        print_warning(f"Could not cache the travel plan: {e}")
+
+async def run_travel_planner(use_cache: bool = True):
+    """Run the travel planner CLI.
+    
+    Args:
+        use_cache: Whether to reuse (and store) results for identical requests
+    """
     print_header()
     
     # Get user input
     print("\n" + "-" * 60)
     print("Please describe your trip in natural language (e.g., 'I want to visit Paris for 5 days in June'):")
-    user_input = input("\n> ").strip()
+    user_input = read_line("\n> ")
     
     if not user_input:
         print_error("No input provided. Exiting...")
@@ -89,6 +214,8 @@ async def run_travel_planner():
         
     # Get output format
     output_format = await get_output_format()
+    # HTML output is a path to a generated file, which may not outlive the cache
+    use_cache = use_cache and output_format != "html"
     
     # Import the AgentState class
     from .workflow import AgentState
@@ -112,7 +239,14 @@ async def run_travel_planner():
     print("Processing your request...\n")
     
     try:
-        result = await travel_planner_workflow.ainvoke(state)
+        cache_path = _result_cache_path(user_input, output_format)
+        result = _load_cached_result(cache_path) if use_cache else None
+        if result is not None:
+            print_info("Using a cached plan for this request.")
+        else:
+            result = await travel_planner_workflow.ainvoke(state)
+            if use_cache and not result.get('error') and result.get('formatter_output'):
+                _save_cached_result(cache_path, result)
         
         # Display results
         if result.get('error'):
@@ -128,10 +262,10 @@ async def run_travel_planner():
             if output_format == "json":
                 try:
                     if isinstance(result['formatter_output'], str):
-                        parsed_json = json.loads(result['formatter_output'])
-                        print(json.dumps(parsed_json, indent=2, ensure_ascii=False))
+                        print(_pretty_json(fastjson.loads(result['formatter_output'])))
                     else:
-                        print(json.dumps(result['formatter_output'], indent=2, ensure_ascii=False))
+                        print(_pretty_json(result['formatter_output']))
+                # orjson's decode/encode errors subclass these
                 except (json.JSONDecodeError, TypeError):
                     print(result['formatter_output'])
             else:
@@ -148,28 +282,19 @@ async def run_travel_planner():
                 daily_plans = itinerary
             
             if daily_plans:
+                # Collect the whole itinerary and write it out in one go
+                parts = []
                 for day in daily_plans:
                     day_num = getattr(day, 'day', getattr(day, 'day_number', 'Unknown'))
-                    print(f"\n{COLORS['BOLD']}Day {day_num}{COLORS['ENDC']}")
-                    print("-" * (4 + len(str(day_num))))
+                    parts.append(f"\n{BOLD}Day {day_num}{ENDC}\n")
+                    parts.append("-" * (4 + len(str(day_num))) + "\n")
                     
                     activities = getattr(day, 'activities', [])
                     for activity in activities:
-                        # Handle both Activity objects and dictionaries
-                        if hasattr(activity, 'start_time'):
-                            start_time = activity.start_time
-                            end_time = getattr(activity, 'end_time', '')
-                            name = getattr(activity, 'name', 'Unnamed Activity')
-                            location = getattr(activity, 'location', '')
-                            description = getattr(activity, 'description', '')
-                        elif isinstance(activity, dict):
-                            start_time = activity.get('start_time', '')
-                            end_time = activity.get('end_time', '')
-                            name = activity.get('name', 'Unnamed Activity')
-                            location = activity.get('location', '')
-                            description = activity.get('description', '')
-                        else:
+                        fields = _extract_activity(activity)
+                        if fields is None:
                             continue
+                        start_time, end_time, name, location, description = fields
                         
                         # Format times if they're time objects
                         if hasattr(start_time, 'strftime'):
@@ -177,33 +302,59 @@ async def run_travel_planner():
                         if hasattr(end_time, 'strftime'):
                             end_time = end_time.strftime('%I:%M %p')
                             
-                        print(f"\n{start_time} - {end_time}: {name}")
+                        parts.append(f"\n{start_time} - {end_time}: {name}\n")
                         if location:
-                            print(f"  📍 {location}")
+                            parts.append(f"  📍 {location}\n")
                         if description:
-                            print(f"  {description}")
+                            parts.append(f"  {description}\n")
+                sys.stdout.write("".join(parts))
         
         # Display any messages
         if 'messages' in result and result['messages']:
             print_section("Messages")
-            for msg in result['messages']:
-                if hasattr(msg, 'content'):
-                    print(f"- {msg.content}")
-                else:
-                    print(f"- {msg}")
+            sys.stdout.write("".join(
+                f"- {msg.content if hasattr(msg, 'content') else msg}\n"
+                for msg in result['messages']
+            ))
         
         print_success("\nYour travel plan is ready! Have a great trip! 🎉")
         
     except Exception as e:
         print_error(f"An unexpected error occurred: {str(e)}")
-        if 'result' in locals():
+        # Dumping the whole result can be expensive, so only do it in debug mode
+        if 'result' in locals() and get_settings().debug:
             print("\nDebug information:")
             print(json.dumps(result, indent=2, default=str))
 
+async def _run_and_cleanup(use_cache: bool = True):
+    """Run the planner, then close network sessions shared by the agents."""
+    try:
+        await run_travel_planner(use_cache=use_cache)
+    finally:
+        # Only agents whose module was imported can have opened a session
+        explorer = sys.modules.get(f"{__package__}.explorer_agent")
+        if explorer is not None:
+            await explorer.ExplorerAgent.close_shared_session()
+        budget = sys.modules.get(f"{__package__}.budget_agent")
+        if budget is not None:
+            await budget.BudgetCalculationAgent.close_shared_session()
+        food = sys.modules.get(f"{__package__}.food_agent")
+        if food is not None:
+            await food.FoodAgent.close_shared_session()
+            await food.FoodAgent.close_shared_batcher()
+
 def main():
     """Main entry point for the CLI."""
+    parser = argparse.ArgumentParser(description="Agentic Travel Planner")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always run the planner instead of reusing a cached plan"
+    )
+    args = parser.parse_args()
+    
     try:
-        asyncio.run(run_travel_planner())
+        asyncio.run(_run_and_cleanup(use_cache=not args.no_cache))
     except KeyboardInterrupt:
         print("\n\nOperation cancelled by user.")
     except Exception as e:
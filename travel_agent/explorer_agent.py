@@ -1,34 +1,92 @@
 """Explorer Agent for discovering points of interest using Tavily API and LLM."""
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, ClassVar, Optional, Tuple, Union
+import asyncio
+import hashlib
+import logging
 import random
-import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-import json
-from datetime import datetime, timedelta
-import requests
+from datetime import datetime
+import aiohttp
+
+from langchain_core.messages import SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
 
 from .base import BaseAgent, PointOfInterest, TravelPlanRequest, TravelStyle
+from .settings import get_settings
+from .utils import fastjson
 
-class ExplorerAgent(BaseAgent):
-    """Agent responsible for discovering points of interest using Tavily API and LLM."""
-    
-    def __init__(self, model_name: str = "openai/gpt-oss-20b", temperature: float = 0.7):
-        """Initialize the ExplorerAgent with Tavily API integration."""
-        self.model_name = model_name
-        self.temperature = temperature
-        self.llm = self._initialize_llm()
-        self.parser = JsonOutputParser()
-        self.tavily_api_key = os.getenv('TAVILY_API_KEY')
-        self.cache_dir = Path("data/cache/poi")
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Define the prompt template for refining Tavily results
-        self.refine_prompt = ChatPromptTemplate.from_messages([
-            ("system", """
+logger = logging.getLogger(__name__)
+
+# Where Tavily search results are cached on disk
+POI_CACHE_DIR = Path("data/cache/poi")
+
+# Tavily results are reused for this long, in memory and on disk
+SEARCH_CACHE_TTL = 7 * 24 * 60 * 60  # 7 days in seconds
+# Most recent searches kept in memory per agent
+SEARCH_MEMORY_CACHE_SIZE = 256
+
+# Attempts per Tavily search, and the exponential backoff between them (seconds)
+TAVILY_MAX_ATTEMPTS = 3
+TAVILY_RETRY_BASE_DELAY = 0.2
+TAVILY_RETRY_MAX_DELAY = 2.0
+
+# Refined POI lists are reused for this long
+REFINED_CACHE_TTL = 30 * 24 * 60 * 60  # 30 days in seconds
+
+# Search results refined per LLM call, and the cap on each call's serialized input
+REFINE_CHUNK_SIZE = 3
+REFINE_CHUNK_MAX_CHARS = 4000
+
+@lru_cache(maxsize=128)
+def _search_queries(
+    destination: str,
+    styles: Tuple[str, ...],
+    interests: Tuple[str, ...],
+    constraints: Tuple[str, ...]
+) -> Tuple[str, ...]:
+    """Build the Tavily search queries for a request (memoized)."""
+    base_query = f"{destination} "
+    return (
+        # Start with a base query for top attractions
+        f"{base_query} top attractions",
+        # Add queries for each travel style
+        *[f"{base_query} best {style} activities" for style in styles],
+        # Add queries for interests (limit to top 3)
+        *[f"{base_query} best {interest} places" for interest in interests[:3]],
+        # Add queries for constraints (limit to top 2)
+        *[f"{base_query} {constraint} friendly places" for constraint in constraints[:2]]
+    )
+
+@lru_cache(maxsize=None)
+def _poi_cache_dir() -> Path:
+    """Create the POI cache directory on first use and return it."""
+    POI_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return POI_CACHE_DIR
+
+def _cache_timestamp(value: Any) -> float:
+    """Get a cache entry's epoch timestamp, accepting legacy ISO-format strings."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            pass
+    return 0.0
+
+def _poi_key(name: Optional[str], location: Optional[str]) -> Tuple[str, str]:
+    """Canonical identity of a POI for de-duplication."""
+    return ((name or "").lower(), (location or "").lower())
+
+# Instructions for refining Tavily results; fixed, so they're never re-rendered
+REFINE_SYSTEM_MESSAGE = SystemMessage(content="""
 You are an expert travel guide. Your task is to process and refine points of interest 
 from various sources into a consistent, structured format.
 
@@ -47,8 +105,10 @@ For each point of interest, extract and structure the following information:
 Consider the user's travel style, budget, and constraints when selecting and describing POIs.
 
 Return a JSON array of objects with the above fields.
-"""),
-            ("human", """
+""")
+
+# Only the request details and search results vary between calls
+REFINE_HUMAN_TEMPLATE = """
 Destination: {destination}
 Travel Style: {travel_style}
 Budget: {budget}
@@ -57,104 +117,258 @@ Constraints: {constraints}
 
 Please process the following search results into structured POI data:
 {search_results}
-""")
-        ])
+"""
+
+# Prompt for refining Tavily results, parsed once at import
+REFINE_PROMPT = ChatPromptTemplate.from_messages([
+    REFINE_SYSTEM_MESSAGE,
+    ("human", REFINE_HUMAN_TEMPLATE)
+])
+
+class ExplorerAgent(BaseAgent):
+    """Agent responsible for discovering points of interest using Tavily API and LLM."""
+    
+    # LLM clients and refine chains shared by all agents, keyed by (model_name, temperature)
+    _LLM_CACHE: ClassVar[Dict[Tuple[str, float], Any]] = {}
+    _CHAIN_CACHE: ClassVar[Dict[Tuple[str, float], Any]] = {}
+    _cache_lock: ClassVar[threading.Lock] = threading.Lock()
+    
+    # HTTP session for Tavily shared by all agents so TLS connections are reused;
+    # created on first use inside the event loop
+    _shared_session: ClassVar[Optional[aiohttp.ClientSession]] = None
+    _session_loop: ClassVar[Optional[asyncio.AbstractEventLoop]] = None
+    _session_lock: ClassVar[Optional[asyncio.Lock]] = None
+    
+    def __init__(self, model_name: str = "openai/gpt-oss-20b", temperature: float = 0.7):
+        """Initialize the ExplorerAgent with Tavily API integration."""
+        self.model_name = model_name
+        self.temperature = temperature
+        self.llm = self._initialize_llm()
+        # Both come from process-wide state that is only set up once
+        self.tavily_api_key = get_settings().tavily_api_key
+        self.cache_dir = _poi_cache_dir()
+        # LRU of (normalized query, max_results) -> (fetched at, results)
+        self._mem_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
         
-        # Create the chain
-        self.chain = self.refine_prompt | self.llm | self.parser
+        # Prompt for refining Tavily results (shared, parsed once)
+        self.refine_prompt = REFINE_PROMPT
+        
+        # Create the chain, reusing one per model configuration
+        self.chain = self._get_chain()
+        self.parser = self.chain.last
     
     def _initialize_llm(self):
-        """Initialize the appropriate LLM based on the model name."""
+        """Initialize the appropriate LLM based on the model name, reusing a cached client."""
         from travel_agent.utils.model_config import ModelConfig
         
         # If model_name is None, get the default from ModelConfig
         if self.model_name is None:
             provider = ModelConfig.get_provider()
             self.model_name = ModelConfig.get_model_name(provider)
-            
-        if "gemini" in self.model_name.lower():
-            return ChatGoogleGenerativeAI(
-                model=self.model_name,
-                temperature=self.temperature
-            )
-        # Default to Groq for other models
-        return ChatGroq(
-            model_name=self.model_name,
-            temperature=self.temperature
-        )
+        
+        key = (self.model_name, self.temperature)
+        with self._cache_lock:
+            llm = self._LLM_CACHE.get(key)
+            if llm is None:
+                if "gemini" in self.model_name.lower():
+                    llm = ChatGoogleGenerativeAI(
+                        model=self.model_name,
+                        temperature=self.temperature
+                    )
+                else:
+                    # Default to Groq for other models
+                    llm = ChatGroq(
+                        model_name=self.model_name,
+                        temperature=self.temperature
+                    )
+                self._LLM_CACHE[key] = llm
+        return llm
+    
+    def _get_chain(self):
+        """Get the prompt | llm | parser chain for this model configuration."""
+        key = (self.model_name, self.temperature)
+        with self._cache_lock:
+            chain = self._CHAIN_CACHE.get(key)
+            if chain is None:
+                chain = self.refine_prompt | self.llm | JsonOutputParser()
+                self._CHAIN_CACHE[key] = chain
+        return chain
+    
+    @classmethod
+    async def _get_session(cls) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it (with a pooled connector) on first use."""
+        loop = asyncio.get_running_loop()
+        session = cls._shared_session
+        if session is not None and not session.closed and cls._session_loop is loop:
+            return session
+        
+        if cls._session_lock is None or cls._session_loop is not loop:
+            cls._session_lock = asyncio.Lock()
+        async with cls._session_lock:
+            session = cls._shared_session
+            # A session from a previous (closed) event loop can't be reused
+            if session is None or session.closed or cls._session_loop is not loop:
+                session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(
+                        limit=50,
+                        limit_per_host=10,
+                        ttl_dns_cache=300,
+                        keepalive_timeout=60
+                    )
+                )
+                cls._shared_session = session
+                cls._session_loop = loop
+        return session
+    
+    @classmethod
+    async def close_shared_session(cls) -> None:
+        """Close the shared HTTP session, if one was opened."""
+        session = cls._shared_session
+        cls._shared_session = None
+        cls._session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+    
+    async def aclose(self) -> None:
+        """Close the HTTP session shared by all ExplorerAgents."""
+        await self.close_shared_session()
+    
+    def _remember(self, key: tuple, fetched_at: float, results: List[Dict[str, Any]]) -> None:
+        """Store search results in the in-memory LRU, evicting the oldest entry when full."""
+        self._mem_cache[key] = (fetched_at, results)
+        self._mem_cache.move_to_end(key)
+        if len(self._mem_cache) > SEARCH_MEMORY_CACHE_SIZE:
+            self._mem_cache.popitem(last=False)
+    
+    @staticmethod
+    def _read_cache(*paths: Path) -> Optional[Dict[str, Any]]:
+        """Read the first existing search cache file (blocking), or return None."""
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    return fastjson.loads(f.read())
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        return None
+    
+    @staticmethod
+    def _write_cache(path: Path, payload: Dict[str, Any]) -> None:
+        """Write a search cache file (blocking)."""
+        path.parent.mkdir(exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(fastjson.dumps(payload, indent=True))
     
     async def search_tavily(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """Search for points of interest using Tavily API."""
         if not self.tavily_api_key:
-            print("Warning: TAVILY_API_KEY not set. Using LLM fallback.")
+            logger.warning("TAVILY_API_KEY not set. Using LLM fallback.")
             return []
             
-        cache_key = f"tavily_{query.lower().replace(' ', '_')}_{max_results}.json"
-        cache_file = self.cache_dir / cache_key
+        # Check the in-memory cache first; trivial query variants share an entry
+        mem_key = (" ".join(query.lower().split()), max_results)
+        cached = self._mem_cache.get(mem_key)
+        if cached is not None:
+            if time.time() - cached[0] < SEARCH_CACHE_TTL:
+                self._mem_cache.move_to_end(mem_key)
+                return cached[1]
+            del self._mem_cache[mem_key]
+            
+        # Content-addressed, filesystem-safe cache file, sharded by hash prefix
+        digest = hashlib.blake2b(f"{mem_key[0]}|{max_results}".encode('utf-8'), digest_size=12).hexdigest()
+        cache_file = self.cache_dir / digest[:2] / f"tavily_{digest}.json"
+        # Files written before hashed keys were introduced
+        legacy_file = self.cache_dir / f"tavily_{query.lower().replace(' ', '_')}_{max_results}.json"
         
-        # Check cache first
-        if cache_file.exists():
-            with open(cache_file, 'r') as f:
-                cache_data = json.load(f)
-                # Check if cache is less than 7 days old
-                cache_time = datetime.fromisoformat(cache_data.get('timestamp', '2000-01-01'))
-                if datetime.now() - cache_time < timedelta(days=7):
-                    return cache_data.get('results', [])
+        # Then the cache file, read off the event loop
+        cache_data = await asyncio.to_thread(self._read_cache, cache_file, legacy_file)
+        if cache_data is not None:
+            # Check if cache is less than 7 days old
+            fetched_at = _cache_timestamp(cache_data.get('timestamp'))
+            if time.time() - fetched_at < SEARCH_CACHE_TTL:
+                results = cache_data.get('results', [])
+                self._remember(mem_key, fetched_at, results)
+                return results
         
         # Call Tavily API
-        url = "https://api.tavily.com/search"
-        headers = {"Content-Type": "application/json"}
         data = {
             "api_key": self.tavily_api_key,
             "query": query,
             "search_depth": "advanced",
             "include_answer": False,
-            "include_raw_content": True,
+            # Page bodies would be cut off by the refine prompt's size limit anyway
+            "include_raw_content": False,
             "max_results": max_results,
             "include_domains": ["tripadvisor.com", "lonelyplanet.com", "wikitravel.org"]
         }
         
+        results = await self._call_tavily(data)
+        if results is None:
+            return []
+        
+        # Cache the results
+        fetched_at = time.time()
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=10)
-            response.raise_for_status()
-            results = response.json().get('results', [])
+            await asyncio.to_thread(self._write_cache, cache_file, {
+                'timestamp': fetched_at,
+                'results': results
+            })
+        except OSError as e:
+            logger.error("Error writing Tavily cache: %s", e)
+        self._remember(mem_key, fetched_at, results)
+        
+        return results
+    
+    async def _call_tavily(self, data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """POST a search to Tavily, retrying transient failures with exponential backoff.
+        
+        Args:
+            data: The JSON request body
             
-            # Cache the results
-            with open(cache_file, 'w') as f:
-                json.dump({
-                    'timestamp': datetime.now().isoformat(),
-                    'results': results
-                }, f, indent=2)
-                
-            return results
+        Returns:
+            The search results, or None if the search failed
+        """
+        url = "https://api.tavily.com/search"
+        headers = {"Content-Type": "application/json"}
+        
+        for attempt in range(1, TAVILY_MAX_ATTEMPTS + 1):
+            try:
+                session = await self._get_session()
+                async with session.post(
+                    url,
+                    headers=headers,
+                    json=data,
+                    timeout=aiohttp.ClientTimeout(total=10)
+                ) as response:
+                    response.raise_for_status()
+                    return fastjson.loads(await response.read()).get('results', [])
+            except aiohttp.ClientResponseError as e:
+                # Client errors such as a bad API key won't succeed on retry
+                if e.status < 500 and e.status != 429:
+                    logger.error("Error calling Tavily API: %s", e)
+                    return None
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+            except ValueError as e:
+                logger.error("Error parsing Tavily response: %s", e)
+                return None
             
-        except Exception as e:
-            print(f"Error calling Tavily API: {e}")
-            return []
+            if attempt < TAVILY_MAX_ATTEMPTS:
+                delay = min(TAVILY_RETRY_MAX_DELAY, TAVILY_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                # Jitter so concurrent searches don't retry in lockstep
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        
+        logger.error("Error calling Tavily API after %d attempts: %r", TAVILY_MAX_ATTEMPTS, error)
+        return None
     
     def _generate_search_queries(self, travel_request: TravelPlanRequest) -> List[str]:
         """Generate search queries based on the travel request."""
-        base_query = f"{travel_request.destination} "
-        
-        # Start with a base query for top attractions
-        queries = [f"{base_query} top attractions"]
-        
-        # Add queries for each travel style
-        if hasattr(travel_request, 'travel_style') and travel_request.travel_style:
-            for style in travel_request.travel_style:
-                queries.append(f"{base_query} best {style.value} activities")
-        
-        # Add queries for interests if any
-        if hasattr(travel_request, 'interests') and travel_request.interests:
-            for interest in travel_request.interests[:3]:  # Limit to top 3 interests
-                queries.append(f"{base_query} best {interest} places")
-                
-        # Add queries for constraints if any
-        if hasattr(travel_request, 'constraints') and travel_request.constraints:
-            for constraint in travel_request.constraints[:2]:  # Limit to top 2 constraints
-                queries.append(f"{base_query} {constraint} friendly places")
-                
-        return queries
+        return list(_search_queries(
+            travel_request.destination,
+            tuple(sorted(style.value for style in travel_request.travel_style or ())),
+            tuple(getattr(travel_request, "interests", None) or ()),
+            tuple(sorted(travel_request.constraints or ()))
+        ))
     
     async def _fetch_from_apis(self, travel_request: TravelPlanRequest, num_pois: int) -> List[PointOfInterest]:
         """Fetch points of interest from external APIs."""
@@ -164,11 +378,17 @@ Please process the following search results into structured POI data:
         # Generate search queries
         search_queries = self._generate_search_queries(travel_request)
         
-        # Search for POIs using Tavily
-        all_results = []
-        for query in search_queries[:3]:  # Limit to top 3 queries
-            results = await self.search_tavily(query, max_results=5)
-            all_results.extend(results)
+        # Search for POIs using Tavily, running the queries concurrently
+        results_lists = await asyncio.gather(
+            *(self.search_tavily(query, max_results=5) for query in search_queries[:3]),  # Limit to top 3 queries
+            return_exceptions=True
+        )
+        all_results = [
+            result
+            for results in results_lists
+            if not isinstance(results, BaseException)
+            for result in results
+        ]
         
         if not all_results:
             return []
@@ -177,59 +397,123 @@ Please process the following search results into structured POI data:
         refined_pois = await self._refine_pois(all_results, travel_request, num_pois)
         
         # Convert to PointOfInterest objects
+        return self._to_pois(refined_pois, travel_request.destination)
+    
+    @staticmethod
+    def _to_pois(
+        items: List[Any],
+        destination: str,
+        required_fields: Tuple[str, ...] = ()
+    ) -> List[PointOfInterest]:
+        """Build PointOfInterest objects from refined POI dicts in a single pass.
+        
+        Only the fields PointOfInterest declares are passed; extra details such as
+        rating or price level would be dropped by the model anyway.
+        
+        Args:
+            items: Refined POI data as returned by the LLM
+            destination: Location used when an item has none
+            required_fields: Keys an item must have to be kept
+            
+        Returns:
+            The POIs that could be built, in input order
+        """
         pois = []
-        for item in refined_pois:
+        for item in items:
+            if not isinstance(item, dict) or not all(field in item for field in required_fields):
+                continue
             try:
-                if isinstance(item, dict):
-                    # Create PointOfInterest object with additional fields
-                    poi = PointOfInterest(
-                        name=item.get("name", ""),
-                        category=item.get("category", "point_of_interest"),
-                        duration_minutes=item.get("duration_minutes", 60),  # Default 1 hour
-                        location=item.get("location", travel_request.destination),
-                        tags=item.get("tags", []),
-                        description=item.get("description", ""),
-                        metadata={
-                            "source": item.get("source", "tavily"),
-                            "rating": item.get("rating"),
-                            "price_level": item.get("price_level"),
-                            "opening_hours": item.get("opening_hours")
-                        }
-                    )
-                    pois.append(poi)
+                pois.append(PointOfInterest(
+                    name=item.get("name", ""),
+                    category=item.get("category", "point_of_interest"),
+                    duration_minutes=item.get("duration_minutes", 60),  # Default 1 hour
+                    location=item.get("location", destination),
+                    tags=item.get("tags", []),
+                    description=item.get("description", "")
+                ))
             except Exception as e:
-                print(f"Error creating POI: {e}")
-                continue
-                
+                logger.error("Error creating POI: %s", e)
         return pois
     
     async def _refine_pois(self, search_results: List[Dict], travel_request: TravelPlanRequest, num_pois: int) -> List[Dict]:
         """Refine raw search results into structured POI data using LLM."""
-        try:
-            # Format the prompt with search results
-            response = await self.chain.ainvoke({
-                "destination": travel_request.destination,
-                "travel_style": travel_request.travel_style if hasattr(travel_request, 'travel_style') else "not specified",
-                "budget": travel_request.budget if hasattr(travel_request, 'budget') else "not specified",
-                "interests": ", ".join(travel_request.interests) if hasattr(travel_request, 'interests') and travel_request.interests else "not specified",
-                "constraints": ", ".join(travel_request.constraints) if hasattr(travel_request, 'constraints') and travel_request.constraints else "none",
-                "search_results": json.dumps(search_results, indent=2)[:4000]  # Limit size
+        prompt_vars = {
+            "destination": travel_request.destination,
+            "travel_style": ", ".join(sorted(style.value for style in travel_request.travel_style)) if hasattr(travel_request, 'travel_style') and travel_request.travel_style else "not specified",
+            "budget": travel_request.budget if hasattr(travel_request, 'budget') else "not specified",
+            "interests": ", ".join(travel_request.interests) if hasattr(travel_request, 'interests') and travel_request.interests else "not specified",
+            "constraints": ", ".join(sorted(travel_request.constraints)) if hasattr(travel_request, 'constraints') and travel_request.constraints else "none"
+        }
+        
+        # Reuse an earlier refinement of the same results for the same preferences
+        cache_file = self._refined_cache_file(search_results, travel_request)
+        cache_data = await asyncio.to_thread(self._read_cache, cache_file)
+        if cache_data is not None and time.time() - _cache_timestamp(cache_data.get('timestamp')) < REFINED_CACHE_TTL:
+            return cache_data.get('results', [])
+        
+        # Refine the results in small chunks concurrently, so the whole corpus
+        # is used and the latency is about that of a single LLM call
+        chunks = [
+            search_results[i:i + REFINE_CHUNK_SIZE]
+            for i in range(0, len(search_results), REFINE_CHUNK_SIZE)
+        ]
+        responses = await asyncio.gather(
+            *(self._refine_chunk(chunk, prompt_vars) for chunk in chunks),
+            return_exceptions=True
+        )
+        
+        # Merge the chunks, keeping the first POI seen for each name and location
+        refined = []
+        seen = set()
+        for response in responses:
+            if isinstance(response, BaseException):
+                logger.error("Error refining POIs with LLM: %s", response)
+                continue
+            for item in response:
+                if not isinstance(item, dict):
+                    continue
+                key = _poi_key(item.get("name"), item.get("location"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                refined.append(item)
+        
+        if refined:
+            await asyncio.to_thread(self._write_cache, cache_file, {
+                'timestamp': time.time(),
+                'results': refined
             })
-            
-            return response if isinstance(response, list) else []
-            
-        except Exception as e:
-            print(f"Error refining POIs with LLM: {e}")
-            return []
+        return refined
+    
+    def _refined_cache_file(self, search_results: List[Dict], travel_request: TravelPlanRequest) -> Path:
+        """Get the cache file for refining these search results for this request."""
+        results_hash = hashlib.blake2b(fastjson.dumps(search_results), digest_size=16).hexdigest()
+        key = hashlib.blake2b(fastjson.dumps({
+            "d": travel_request.destination,
+            "s": sorted(style.value for style in getattr(travel_request, "travel_style", None) or ()),
+            "b": getattr(travel_request, "budget", None),
+            "i": list(getattr(travel_request, "interests", None) or ()),
+            "c": sorted(getattr(travel_request, "constraints", None) or ()),
+            "h": results_hash
+        }), digest_size=16).hexdigest()
+        return self.cache_dir.parent / "refined" / f"{key}.json"
+    
+    async def _refine_chunk(self, chunk: List[Dict], prompt_vars: Dict[str, Any]) -> List[Dict]:
+        """Refine one chunk of search results with a single LLM call."""
+        response = await self.chain.ainvoke({
+            **prompt_vars,
+            "search_results": fastjson.dumps(chunk).decode('utf-8')[:REFINE_CHUNK_MAX_CHARS]  # Limit size
+        })
+        return response if isinstance(response, list) else []
     
     async def _generate_with_llm(self, travel_request: TravelPlanRequest, num_pois: int) -> List[PointOfInterest]:
         """Generate POIs using LLM when API calls fail or are insufficient."""
         try:
             # Get travel styles as a string or use a default
-            travel_styles = ", ".join([style.value for style in travel_request.travel_style]) if hasattr(travel_request, 'travel_style') and travel_request.travel_style else "Not specified"
+            travel_styles = ", ".join(sorted(style.value for style in travel_request.travel_style)) if hasattr(travel_request, 'travel_style') and travel_request.travel_style else "Not specified"
             
             # Get constraints as a string or use a default
-            constraints = ", ".join(travel_request.constraints) if hasattr(travel_request, 'constraints') and travel_request.constraints else "None"
+            constraints = ", ".join(sorted(travel_request.constraints)) if hasattr(travel_request, 'constraints') and travel_request.constraints else "None"
             
             # Get budget or use a default
             budget = travel_request.budget if hasattr(travel_request, 'budget') else "Not specified"
@@ -253,46 +537,22 @@ Please process the following search results into structured POI data:
                 "budget": budget,
                 "interests": interests,
                 "constraints": constraints,
-                "search_results": json.dumps(mock_search_results, indent=2)
+                "search_results": fastjson.dumps(mock_search_results).decode('utf-8')
             })
             
             # Parse and validate the response
             if not isinstance(response, list):
                 response = [response] if response else []
                 
-            # Convert to PointOfInterest objects
-            pois = []
-            for item in response:
-                try:
-                    if isinstance(item, dict):
-                        # Ensure all required fields are present
-                        if not all(field in item for field in ["name", "category", "duration_minutes"]):
-                            continue
-                            
-                        # Create PointOfInterest object with metadata
-                        poi = PointOfInterest(
-                            name=item["name"],
-                            category=item["category"],
-                            duration_minutes=item["duration_minutes"],
-                            location=item.get("location", travel_request.destination),
-                            tags=item.get("tags", []),
-                            description=item.get("description", ""),
-                            metadata={
-                                "source": item.get("source", "llm"),
-                                "rating": item.get("rating"),
-                                "price_level": item.get("price_level"),
-                                "opening_hours": item.get("opening_hours")
-                            }
-                        )
-                        pois.append(poi)
-                except Exception as e:
-                    print(f"Error parsing POI: {e}")
-                    continue
-                    
-            return pois
+            # Convert to PointOfInterest objects, skipping items missing required fields
+            return self._to_pois(
+                response,
+                travel_request.destination,
+                required_fields=("name", "category", "duration_minutes")
+            )
             
-        except Exception as e:
-            print(f"Error generating POIs with LLM: {e}")
+        except Exception:
+            logger.exception("Error generating POIs with LLM")
             return []
     
     async def process(self, travel_request: TravelPlanRequest) -> List[PointOfInterest]:
@@ -315,11 +575,18 @@ Please process the following search results into structured POI data:
         if len(pois) < target_pois:
             remaining = target_pois - len(pois)
             llm_pois = await self._generate_with_llm(travel_request, remaining)
-            pois.extend(poi for poi in llm_pois if poi not in pois)
+            
+            # Skip LLM POIs already found, matching on name and location
+            seen = {_poi_key(poi.name, poi.location) for poi in pois}
+            for poi in llm_pois:
+                key = _poi_key(poi.name, poi.location)
+                if key not in seen:
+                    seen.add(key)
+                    pois.append(poi)
         
         # Ensure we have at least some POIs
         if not pois:
-            print("Warning: No POIs found. Using fallback generation.")
+            logger.warning("No POIs found. Using fallback generation.")
             pois = await self._generate_with_llm(travel_request, 5)
             
         return pois
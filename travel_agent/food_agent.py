@@ -1,19 +1,101 @@
 """FoodAgent for suggesting must-try local foods and dining experiences."""
-from typing import Dict, List, Optional, Any, Tuple
+from typing import ClassVar, Dict, Iterator, List, Optional, Any, Tuple
+import asyncio
 import os
-import json
+import re
+import struct
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
 from dataclasses import dataclass
-import requests
-from datetime import datetime
+from datetime import datetime, timedelta
+import aiohttp
 
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 
+from .settings import get_settings
+from .utils.batching import MicroBatcher
+from .utils import fastjson
+
 # Import the Tavily API key from environment variables
 TAVILY_API_KEY = os.getenv('TAVILY_API_KEY', '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')
 
-@dataclass
+# Tavily searches allowed in flight at once across all FoodAgents
+TAVILY_MAX_CONCURRENCY = 8
+
+# Food suggestions cache: one length-prefixed JSON record per cache entry
+CACHE_FILE = Path("data/food_suggestions_cache.bin")
+# Single JSON document used before the framed format; read once to migrate
+LEGACY_CACHE_FILE = Path("data/food_suggestions_cache.json")
+# Cached suggestions are reused for this long
+FOOD_CACHE_TTL = timedelta(days=30)
+
+# Big-endian byte length that precedes each cache record
+_FRAME_HEADER = struct.Struct(">I")
+
+# Runs of anything but letters and digits, which don't distinguish places
+_NON_WORD = re.compile(r'[\W_]+')
+
+def _normalize_place(text: str) -> str:
+    """Canonical form of a place or season name for cache lookups.
+    
+    Case, accents, punctuation and spacing are ignored, so that e.g.
+    "Paris, France", "paris (france)" and "PARIS  FRANCE" share one key.
+    Qualifiers are kept, so a bare "Paris" is a different key: dropping them
+    would also merge "Paris, Texas" into "Paris".
+    """
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_WORD.sub(' ', stripped.casefold()).strip()
+
+# Words in a search result title that mark it as being about food
+_FOOD_KEYWORDS = re.compile(r'food|dish|cuisine', re.IGNORECASE)
+
+# Dietary info tags that rule a food out for a restriction, and tags a food must
+# have; restrictions not listed here don't filter anything
+_DIETARY_EXCLUDES: Dict[str, frozenset] = {
+    'vegetarian': frozenset({'non-vegetarian'}),
+    'gluten-free': frozenset({'gluten'}),
+}
+_DIETARY_REQUIRES: Dict[str, frozenset] = {
+    'vegan': frozenset({'vegan'}),
+}
+
+@lru_cache(maxsize=4096)
+def _cache_key(location: str, season: Optional[str]) -> str:
+    """Build the cache key for a location and season (memoized)."""
+    key = _normalize_place(location)
+    if season:
+        key += f":{_normalize_place(season)}"
+    return key
+
+def _is_expired(entry: Dict[str, Any]) -> bool:
+    """Whether a cache entry is older than FOOD_CACHE_TTL (or has no usable timestamp)."""
+    try:
+        return datetime.now() - datetime.fromisoformat(entry['timestamp']) >= FOOD_CACHE_TTL
+    except (KeyError, TypeError, ValueError):
+        return True
+
+def _encode_frame(key: str, entry: Dict[str, Any]) -> bytes:
+    """Encode one cache entry as a length-prefixed record."""
+    buf = fastjson.dumps({'key': key, 'entry': entry})
+    return _FRAME_HEADER.pack(len(buf)) + buf
+
+def _iter_frames(data: bytes) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """Yield (record, frame size) for each record in a framed cache file, stopping at a truncated tail."""
+    offset = 0
+    end = len(data)
+    while offset + _FRAME_HEADER.size <= end:
+        (length,) = _FRAME_HEADER.unpack_from(data, offset)
+        offset += _FRAME_HEADER.size
+        if offset + length > end:
+            break
+        yield fastjson.loads(data[offset:offset + length]), _FRAME_HEADER.size + length
+        offset += length
+
+@dataclass(slots=True)
 class FoodSuggestion:
     """Data class for food suggestions."""
     name: str
@@ -50,6 +132,16 @@ class FoodSuggestion:
 class FoodAgent:
     """Agent responsible for suggesting must-try local foods and dining experiences."""
     
+    # HTTP session for Tavily shared by all agents, and the cap on concurrent
+    # searches; created on first use inside the event loop
+    _shared_session: ClassVar[Optional[aiohttp.ClientSession]] = None
+    _session_loop: ClassVar[Optional[asyncio.AbstractEventLoop]] = None
+    _search_semaphore: ClassVar[Optional[asyncio.Semaphore]] = None
+    
+    # Concurrent LLM lookups from all agents (e.g. several cities planned at
+    # once) are batched by a single shared worker
+    _llm_batcher: ClassVar[Optional[MicroBatcher]] = None
+    
     def __init__(self, model_name: str = "gpt-3.5-turbo", temperature: float = 0.7, use_llm: bool = True):
         """
         Initialize the FoodAgent.
@@ -63,8 +155,16 @@ class FoodAgent:
         self.model_name = model_name
         self.temperature = temperature
         self.llm = None
-        self.cache_file = Path("data/food_suggestions_cache.json")
-        self.cache = {}
+        self.cache_file = CACHE_FILE
+        # Least recently used first; capped at max_entries
+        self.cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_entries = get_settings().food_cache_max_entries
+        # Bytes of the newest record per key, and of the whole cache log; the log is
+        # compacted once superseded records make up more than half of it
+        self._entry_sizes: Dict[str, int] = {}
+        self._live_bytes = 0
+        # None when the file's contents are unknown and it must be rewritten
+        self._file_size: Optional[int] = 0
         
         if use_llm:
             self.llm = ChatOpenAI(
@@ -77,32 +177,127 @@ class FoodAgent:
         self._load_cache()
     
     def _load_cache(self) -> None:
-        """Load food suggestions cache from file."""
+        """Load food suggestions cache from file, migrating the legacy JSON cache."""
         try:
             if self.cache_file.exists():
-                with open(self.cache_file, 'r') as f:
-                    self.cache = json.load(f)
+                with open(self.cache_file, 'rb') as f:
+                    data = f.read()
+                # Replay the log; a later record for a key supersedes earlier ones
+                replayed = 0
+                for record, size in _iter_frames(data):
+                    replayed += size
+                    key = self._entry_cache_key(record['key'], record['entry'])
+                    self.cache[key] = record['entry']
+                    self.cache.move_to_end(key)
+                    self._live_bytes += size - self._entry_sizes.get(key, 0)
+                    self._entry_sizes[key] = size
+                self._file_size = len(data)
+                # A truncated tail would misalign later appends, so rewrite the file first
+                if replayed < len(data):
+                    self._file_size = None
+            elif LEGACY_CACHE_FILE.exists():
+                with open(LEGACY_CACHE_FILE, 'rb') as f:
+                    self.cache = OrderedDict(
+                        (self._entry_cache_key(key, entry), entry)
+                        for key, entry in fastjson.loads(f.read()).items()
+                    )
+                # Written in the framed format on the next save
+                self._file_size = None
+            
+            # Expired and excess entries are dropped from the log at the next compaction
+            for key in [key for key, entry in self.cache.items() if _is_expired(entry)]:
+                self._forget(key)
+            self._evict_excess()
         except Exception as e:
             print(f"Error loading food cache: {e}")
-            self.cache = {}
+            self.cache = OrderedDict()
+            self._entry_sizes = {}
+            self._live_bytes = 0
+            self._file_size = None
+    
+    def _forget(self, key: str) -> None:
+        """Drop an entry from the in-memory cache; its records become dead bytes in the log."""
+        del self.cache[key]
+        self._live_bytes -= self._entry_sizes.pop(key, 0)
+    
+    def _evict_excess(self) -> None:
+        """Evict least recently used entries until the cache fits max_entries."""
+        while len(self.cache) > self.max_entries:
+            self._forget(next(iter(self.cache)))
     
-    def _save_cache(self) -> None:
-        """Save food suggestions cache to file."""
+    def _needs_compaction(self) -> bool:
+        """Whether the cache log must be rewritten before more records are appended."""
+        return self._file_size is None or self._file_size > 2 * self._live_bytes
+    
+    def _append_cache_entry(self, key: str, entry: Dict[str, Any]) -> None:
+        """Append one cache entry to the cache log, compacting the log when it has grown stale."""
         try:
+            if self._file_size is None:
+                self._compact_cache()
+                return
+            
+            frame = _encode_frame(key, entry)
             self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
+            with open(self.cache_file, 'ab') as f:
+                f.write(frame)
+            self._file_size += len(frame)
+            self._live_bytes += len(frame) - self._entry_sizes.get(key, 0)
+            self._entry_sizes[key] = len(frame)
+            
+            if self._needs_compaction():
+                self._compact_cache()
         except Exception as e:
             print(f"Error saving food cache: {e}")
+            self._file_size = None
+    
+    def _compact_cache(self) -> None:
+        """Rewrite the cache log with only the current entries."""
+        frames = {key: _encode_frame(key, entry) for key, entry in self.cache.items()}
+        data = b"".join(frames.values())
+        
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.cache_file.with_suffix('.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, self.cache_file)
+        
+        self._entry_sizes = {key: len(frame) for key, frame in frames.items()}
+        self._live_bytes = len(data)
+        self._file_size = len(data)
     
     def _get_cache_key(self, location: str, season: str = None) -> str:
         """Generate a cache key for the given location and season."""
-        key = location.lower().strip()
-        if season:
-            key += f":{season.lower().strip()}"
+        return _cache_key(location, season)
+    
+    def _entry_cache_key(self, key: str, entry: Dict[str, Any]) -> str:
+        """Recompute a stored entry's key, so entries saved under an older key format still match."""
+        if isinstance(entry, dict) and entry.get('location'):
+            return self._get_cache_key(entry['location'], entry.get('season'))
         return key
     
-    def _search_web_for_foods(self, location: str) -> List[Dict[str, Any]]:
+    @classmethod
+    def _get_session(cls) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use in the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = cls._shared_session
+        # A session from a previous (closed) event loop can't be reused
+        if session is None or session.closed or cls._session_loop is not loop:
+            session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+            cls._shared_session = session
+            cls._session_loop = loop
+            cls._search_semaphore = asyncio.Semaphore(TAVILY_MAX_CONCURRENCY)
+        return session
+    
+    @classmethod
+    async def close_shared_session(cls) -> None:
+        """Close the shared HTTP session, if one was opened."""
+        session = cls._shared_session
+        cls._shared_session = None
+        cls._session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+    
+    async def _search_web_for_foods(self, location: str) -> List[Dict[str, Any]]:
         """
         Search the web for popular foods in the given location.
         
@@ -117,22 +312,22 @@ class FoodAgent:
             url = "https://api.tavily.com/search"
             query = f"must try local foods in {location} site:tripadvisor.com OR lonelyplanet.com OR timeout.com"
             
-            response = requests.post(
-                url,
-                json={
-                    "api_key": TAVILY_API_KEY,
-                    "query": query,
-                    "search_depth": "advanced",
-                    "include_answer": True,
-                    "include_raw_content": True,
-                    "max_results": 5
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                results = response.json()
-                return results.get('results', [])
+            session = self._get_session()
+            async with self._search_semaphore:
+                async with session.post(
+                    url,
+                    json={
+                        "api_key": TAVILY_API_KEY,
+                        "query": query,
+                        "search_depth": "advanced",
+                        "include_answer": True,
+                        "include_raw_content": True,
+                        "max_results": 5
+                    }
+                ) as response:
+                    if response.status == 200:
+                        results = fastjson.loads(await response.read())
+                        return results.get('results', [])
                 
         except Exception as e:
             print(f"Error searching for foods: {e}")
@@ -161,7 +356,7 @@ class FoodAgent:
             
             # Simple heuristic to identify food items
             # In a real app, you'd use more sophisticated NLP here
-            if 'food' in title.lower() or 'dish' in title.lower() or 'cuisine' in title.lower():
+            if _FOOD_KEYWORDS.search(title):
                 food_name = title.split('|')[0].split('-')[0].strip()
                 
                 # Create a basic food suggestion
@@ -185,6 +380,8 @@ class FoodAgent:
         """
         Get food suggestions using LLM.
         
+        Concurrent calls are batched into a single LLM request.
+        
         Args:
             location: Name of the location
             season: Current season (optional)
@@ -196,51 +393,104 @@ class FoodAgent:
             return []
             
         try:
-            # Prepare the prompt
-            prompt = f"""You are a knowledgeable local food expert. Provide a list of 5-7 must-try local foods or 
+            return await self._get_batcher().submit((self, location, season))
+        except Exception as e:
+            print(f"Error getting food suggestions from LLM: {e}")
+            
+        return []
+    
+    @classmethod
+    def _get_batcher(cls) -> MicroBatcher:
+        """Get the shared LLM batcher, creating it on first use."""
+        if cls._llm_batcher is None:
+            cls._llm_batcher = MicroBatcher(cls._generate_food_suggestions, max_batch_size=8, max_wait_ms=20)
+        return cls._llm_batcher
+    
+    @classmethod
+    async def close_shared_batcher(cls) -> None:
+        """Stop the shared LLM batching worker, if one was started."""
+        batcher = cls._llm_batcher
+        cls._llm_batcher = None
+        if batcher is not None:
+            await batcher.close()
+    
+    @staticmethod
+    async def _generate_food_suggestions(
+        lookups: List[Tuple["FoodAgent", str, Optional[str]]]
+    ) -> List[List[FoodSuggestion]]:
+        """
+        Generate food suggestions for a batch of lookups, one LLM call per model.
+        
+        Args:
+            lookups: The (agent, location, season) triples to get suggestions for
+            
+        Returns:
+            One list of FoodSuggestion objects per lookup, in lookup order
+        """
+        # Lookups from agents sharing an LLM client go out in a single call
+        groups: Dict[int, List[int]] = {}
+        for i, (agent, _, _) in enumerate(lookups):
+            groups.setdefault(id(agent.llm), []).append(i)
+        
+        results: List[List[FoodSuggestion]] = [[] for _ in lookups]
+        
+        async def generate(indices: List[int]) -> None:
+            agent = lookups[indices[0]][0]
+            response = await agent.llm.agenerate([
+                agent._food_messages(lookups[i][1], lookups[i][2]) for i in indices
+            ])
+            for i, generation in zip(indices, response.generations):
+                results[i] = agent._parse_food_response(generation[0].text)
+        
+        outcomes = await asyncio.gather(*(generate(indices) for indices in groups.values()), return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                print(f"Error getting food suggestions from LLM: {outcome}")
+        return results
+    
+    def _food_messages(self, location: str, season: Optional[str]) -> List[Any]:
+        """Build the LLM messages asking for food suggestions for one location."""
+        # Prepare the prompt
+        prompt = f"""You are a knowledgeable local food expert. Provide a list of 5-7 must-try local foods or 
             dishes for {location}. Include a brief description, category (breakfast, lunch, dinner, snack, dessert), 
             price range ($-$$$$), dietary information (vegetarian, vegan, gluten-free, etc.), best time to try 
             (breakfast, lunch, dinner, anytime), and best season to try (spring, summer, fall, winter, or all). 
             Also suggest 1-2 well-known places to try each dish in {location}."""
-            
-            if season:
-                prompt += f" The current season is {season} - highlight seasonal specialties if any."
-            
-            messages = [
-                SystemMessage(content=prompt),
-                HumanMessage(content=f"Please provide food suggestions for {location} in a structured JSON format.")
-            ]
-            
-            # Get response from LLM
-            response = await self.llm.agenerate([messages])
-            
-            # Parse the response (this is simplified - in a real app, you'd need more robust parsing)
-            try:
-                # Extract JSON from the response
-                import re
-                json_str = re.search(r'```json\n(.*?)\n```', response.generations[0][0].text, re.DOTALL)
-                if json_str:
-                    food_data = json.loads(json_str.group(1))
-                    return [
-                        FoodSuggestion(
-                            name=item.get('name', ''),
-                            description=item.get('description', ''),
-                            category=item.get('category', 'meal'),
-                            price_range=item.get('price_range', '$$'),
-                            dietary_info=item.get('dietary_info', []),
-                            best_time_to_try=item.get('best_time_to_try', 'anytime'),
-                            best_season=item.get('best_season', ['all']),
-                            must_try=item.get('must_try', True),
-                            restaurant_suggestions=item.get('restaurant_suggestions', []),
-                            image_url=item.get('image_url')
-                        )
-                        for item in food_data.get('foods', [])
-                    ]
-            except Exception as e:
-                print(f"Error parsing LLM response: {e}")
-                
+        
+        if season:
+            prompt += f" The current season is {season} - highlight seasonal specialties if any."
+        
+        return [
+            SystemMessage(content=prompt),
+            HumanMessage(content=f"Please provide food suggestions for {location} in a structured JSON format.")
+        ]
+    
+    def _parse_food_response(self, text: str) -> List[FoodSuggestion]:
+        """Parse the food suggestions out of one LLM response."""
+        # Parse the response (this is simplified - in a real app, you'd need more robust parsing)
+        try:
+            # The JSON object runs from the first '{' to the last '}', fenced or not
+            start = text.find('{')
+            end = text.rfind('}')
+            if start != -1 and end > start:
+                food_data = fastjson.loads(text[start:end + 1])
+                return [
+                    FoodSuggestion(
+                        name=item.get('name', ''),
+                        description=item.get('description', ''),
+                        category=item.get('category', 'meal'),
+                        price_range=item.get('price_range', '$$'),
+                        dietary_info=item.get('dietary_info', []),
+                        best_time_to_try=item.get('best_time_to_try', 'anytime'),
+                        best_season=item.get('best_season', ['all']),
+                        must_try=item.get('must_try', True),
+                        restaurant_suggestions=item.get('restaurant_suggestions', []),
+                        image_url=item.get('image_url')
+                    )
+                    for item in food_data.get('foods', [])
+                ]
         except Exception as e:
-            print(f"Error getting food suggestions from LLM: {e}")
+            print(f"Error parsing LLM response: {e}")
             
         return []
     
@@ -261,9 +511,9 @@ class FoodAgent:
         cache_key = self._get_cache_key(location, season)
         if use_cache and cache_key in self.cache:
             cached = self.cache[cache_key]
-            # Check if cache is still valid (e.g., not older than 30 days)
-            cache_time = datetime.fromisoformat(cached['timestamp'])
-            if (datetime.now() - cache_time).days < 30:
+            # Check if cache is still valid (not older than 30 days)
+            if not _is_expired(cached):
+                self.cache.move_to_end(cache_key)
                 return [FoodSuggestion.from_dict(item) for item in cached['suggestions']]
         
         # Get suggestions
@@ -271,17 +521,20 @@ class FoodAgent:
             suggestions = await self.get_food_suggestions_llm(location, season)
         else:
             # Fallback to web search
-            search_results = self._search_web_for_foods(location)
+            search_results = await self._search_web_for_foods(location)
             suggestions = self._extract_food_info(search_results)
         
         # Update cache
-        self.cache[cache_key] = {
+        entry = {
             'timestamp': datetime.now().isoformat(),
             'location': location,
             'season': season,
             'suggestions': [s.to_dict() for s in suggestions]
         }
-        self._save_cache()
+        self.cache[cache_key] = entry
+        self.cache.move_to_end(cache_key)
+        self._evict_excess()
+        self._append_cache_entry(cache_key, entry)
         
         return suggestions
     
@@ -296,13 +549,8 @@ class FoodAgent:
             Dictionary mapping categories to lists of food suggestions
         """
         categories = {}
-        
         for suggestion in suggestions:
-            category = suggestion.category.lower()
-            if category not in categories:
-                categories[category] = []
-            categories[category].append(suggestion)
-        
+            categories.setdefault(suggestion.category.lower(), []).append(suggestion)
         return categories
     
     def filter_by_dietary_restrictions(self, suggestions: List[FoodSuggestion], 
@@ -320,31 +568,17 @@ class FoodAgent:
         if not restrictions:
             return suggestions
             
-        # Convert restrictions to lowercase for case-insensitive matching
-        restrictions = [r.lower() for r in restrictions]
+        # Fold all restrictions into the tags to rule out and the tags to insist on
+        excluded = frozenset().union(*(_DIETARY_EXCLUDES.get(r.lower(), ()) for r in restrictions))
+        required = frozenset().union(*(_DIETARY_REQUIRES.get(r.lower(), ()) for r in restrictions))
         
-        def matches_restrictions(suggestion: FoodSuggestion) -> bool:
+        filtered = []
+        for suggestion in suggestions:
             # If no dietary info is available, include the suggestion
             if not suggestion.dietary_info:
-                return True
-                
-            # Check if all restrictions are satisfied
-            for restriction in restrictions:
-                # Handle common variations
-                if restriction == 'vegetarian':
-                    if 'non-vegetarian' in suggestion.dietary_info:
-                        return False
-                    if 'vegetarian' not in suggestion.dietary_info and 'vegan' not in suggestion.dietary_info:
-                        # If no info, be conservative and include it
-                        pass
-                elif restriction == 'vegan':
-                    if 'vegan' not in suggestion.dietary_info:
-                        return False
-                elif restriction == 'gluten-free':
-                    if 'gluten-free' not in suggestion.dietary_info and 'gluten' in suggestion.dietary_info:
-                        return False
-                # Add more restrictions as needed
-                
-            return True
-        
-        return [s for s in suggestions if matches_restrictions(s)]
+                filtered.append(suggestion)
+                continue
+            diet = frozenset(tag.lower() for tag in suggestion.dietary_info)
+            if required <= diet and not diet & excluded:
+                filtered.append(suggestion)
+        return filtered
@@ -204,10 +204,10 @@ IMPORTANT: Be realistic about what can be accomplished in a day. Don't over-sche
                 "start_date": start_date,
                 "end_date": end_date,
                 "duration_days": travel_request.duration_days,
-                "travel_style": ", ".join(travel_request.travel_style) if hasattr(travel_request, 'travel_style') and travel_request.travel_style else "Not specified",
+                "travel_style": ", ".join(sorted(travel_request.travel_style)) if hasattr(travel_request, 'travel_style') and travel_request.travel_style else "Not specified",
                 "budget": travel_request.budget if hasattr(travel_request, 'budget') and travel_request.budget else "Not specified",
                 "interests": ", ".join(travel_request.interests) if hasattr(travel_request, 'interests') and travel_request.interests else "Not specified",
-                "constraints": ", ".join(travel_request.constraints) if hasattr(travel_request, 'constraints') and travel_request.constraints else "None",
+                "constraints": ", ".join(sorted(travel_request.constraints)) if hasattr(travel_request, 'constraints') and travel_request.constraints else "None",
                 "pois": pois_str
             }
             
@@ -1437,13 +1437,11 @@ IMPORTANT: Be realistic about what can be accomplished in a day. Don't over-sche
                         current_time = lunch_end
                 current_time = lunch_end
             
-            # Convert Activity objects to dictionaries and add them to the daily itinerary
-            daily_activities = []
-            for a in activities:
-                if hasattr(a, 'dict'):
-                    daily_activities.append(a.dict())
-                else:
-                    daily_activities.append(a)
+            # Validate activity dicts into Activity models once
+            daily_activities = [
+                a if isinstance(a, Activity) else Activity.model_validate(a)
+                for a in activities
+            ]
             
             # Create the daily itinerary with the converted activities
             daily_itinerary = DailyItinerary(
@@ -1454,8 +1452,8 @@ IMPORTANT: Be realistic about what can be accomplished in a day. Don't over-sche
             
             print(f"\nDEBUG: Created daily itinerary for day {day} with {len(daily_activities)} activities")
             for i, activity in enumerate(daily_activities):
-                print(f"  Activity {i+1}: {activity.get('name', 'Unnamed')} "
-                      f"({activity.get('start_time', '?')} - {activity.get('end_time', '?')})")
+                print(f"  Activity {i+1}: {activity.name} "
+                      f"({activity.start_time} - {activity.end_time})")
             
             daily_itineraries.append(daily_itinerary)
         
@@ -1586,6 +1584,33 @@ IMPORTANT: Be realistic about what can be accomplished in a day. Don't over-sche
                 
         return tips['default']
     
+    @staticmethod
+    def _coerce_activities(activities: Any, destination: str) -> List[Activity]:
+        """Turn parsed LLM activities into Activity models.
+        
+        Missing or null fields get the same defaults the parser uses, so one
+        incomplete activity doesn't invalidate the whole day; items that are
+        not activities at all are dropped.
+        """
+        coerced = []
+        for item in activities or []:
+            if isinstance(item, Activity):
+                coerced.append(item)
+                continue
+            if not isinstance(item, dict):
+                print(f"WARNING: Skipping non-dict activity item: {item}")
+                continue
+            coerced.append(Activity(
+                name=str(item.get('name') or 'Activity'),
+                start_time=str(item.get('start_time') or ''),
+                end_time=str(item.get('end_time') or ''),
+                location=str(item.get('location') or destination),
+                description=None if item.get('description') is None else str(item['description']),
+                category=None if item.get('category') is None else str(item['category']),
+                notes=None if item.get('notes') is None else str(item['notes'])
+            ))
+        return coerced
+    
     async def process(self, travel_request: TravelPlanRequest, selected_pois: List[Dict[str, Any]]) -> TravelItinerary:
         """Process the travel request and selected POIs to create a travel itinerary.
         
@@ -1611,7 +1636,12 @@ IMPORTANT: Be realistic about what can be accomplished in a day. Don't over-sche
             # Convert any dicts to DailyItinerary objects
             for i, plan in enumerate(daily_plans):
                 if isinstance(plan, dict):
-                    daily_plans[i] = DailyItinerary(**plan)
+                    daily_plans[i] = DailyItinerary(**{
+                        **plan,
+                        'activities': self._coerce_activities(
+                            plan.get('activities'), travel_request.destination
+                        )
+                    })
             
             # Create a TravelItinerary with the daily plans
             return TravelItinerary(
@@ -1817,9 +1847,9 @@ async def test_itinerary_agent(destination: str = "Paris, France", duration_days
         print(f"\nDay {day_plan.day}")
         print("-" * 10)
         for activity in day_plan.activities:
-            print(f"{activity['start_time']} - {activity['end_time']}: {activity['name']}")
-            print(f"  Location: {activity['location']}")
-            print(f"  {activity['description']}")
+            print(f"{activity.start_time} - {activity.end_time}: {activity.name}")
+            print(f"  Location: {activity.location}")
+            print(f"  {activity.description}")
     
 if __name__ == "__main__":
     import asyncio
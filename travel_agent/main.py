@@ -1,6 +1,5 @@
 """Main module for the Agentic Travel Planner system using LangGraph."""
 import asyncio
-import json
 from typing import Optional, Dict, Any
 from datetime import datetime
 
@@ -21,9 +20,9 @@ def print_itinerary(itinerary: TravelItinerary):
     for day_plan in itinerary.daily_plans:
         print(f"\n{'-'*20} DAY {day_plan.day} {'-'*20}")
         for activity in day_plan.activities:
-            print(f"\n{activity['time']} - {activity['activity']}")
-            if activity.get('notes'):
-                print(f"   {activity['notes']}")
+            print(f"\n{activity.start_time} - {activity.name}")
+            if activity.notes:
+                print(f"   {activity.notes}")
     
     if hasattr(itinerary, 'additional_notes') and itinerary.additional_notes:
         print(f"\n{'*'*50}")
@@ -58,7 +57,7 @@ async def main():
         # Optional: Save the itinerary to a file
         if result.get("itinerary"):
             with open("travel_itinerary.json", "w") as f:
-                json.dump(result["itinerary"].dict(), f, indent=2)
+                f.write(result["itinerary"].model_dump_json(indent=2))
             print("\n✓ Itinerary saved to 'travel_itinerary.json'")
         
     except Exception as e:
@@ -1,8 +1,8 @@
 """Data models for the travel planning system."""
 from datetime import datetime, date, time
 from enum import Enum
-from typing import List, Dict, Any, Optional, Union
-from pydantic import BaseModel, Field, validator
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple, Union
+from pydantic import BaseModel, ConfigDict, Field, field_validator, validator
 
 class TravelStyle(str, Enum):
     ADVENTURE = "adventure"
@@ -26,6 +26,18 @@ class TravelStyle(str, Enum):
     SHOPPING = "shopping"
     WELLNESS = "wellness"
 
+    @classmethod
+    def _missing_(cls, value):
+        """Accept values that differ only in case or surrounding whitespace."""
+        if isinstance(value, str):
+            return cls._value2member_map_.get(value.strip().lower())
+        return None
+
+    @classmethod
+    def from_str(cls, value: str) -> "TravelStyle":
+        """Look up a style by its exact value with a single dict access."""
+        return cls._value2member_map_[value]
+
 class TransportMode(str, Enum):
     BIKE = "bike"
     CAR = "car"
@@ -92,19 +104,36 @@ class TravelItinerary(BaseModel):
     origin: Optional[str] = None
     transport_modes: List[TransportMode] = [TransportMode.BUS, TransportMode.TRAIN]
 
+def _coerce_style(value: Any) -> TravelStyle:
+    """Map a raw value to a TravelStyle, accepting differences in case and surrounding whitespace."""
+    if isinstance(value, TravelStyle):
+        return value
+    try:
+        return TravelStyle.from_str(value)
+    except (KeyError, TypeError):
+        # Falls back to TravelStyle._missing_ for other case or whitespace
+        return TravelStyle(value)
+
 class TravelPlanRequest(BaseModel):
-    """Represents a travel plan request."""
+    """Represents a travel plan request.
+
+    The request is frozen (and therefore hashable) so it can be used as a
+    memoization key; styles and constraints are sets for O(1) membership tests.
+    Use ``model_copy(update=...)`` to derive a changed request.
+    """
+    model_config = ConfigDict(frozen=True)
+
     destination: str
     duration_days: int
-    travel_style: List[TravelStyle]
+    travel_style: FrozenSet[TravelStyle]
     budget: str
-    interests: List[str] = []
-    constraints: List[str] = []
+    interests: Tuple[str, ...] = ()
+    constraints: FrozenSet[str] = frozenset()
     origin: Optional[str] = None
     start_date: Optional[date] = None
     end_date: Optional[date] = None
-    preferred_transport: List[TransportMode] = [TransportMode.BUS, TransportMode.TRAIN]
-    additional_stops: List[str] = []
+    preferred_transport: Tuple[TransportMode, ...] = (TransportMode.BUS, TransportMode.TRAIN)
+    additional_stops: Tuple[str, ...] = ()
     group_size: int = Field(
         default=1,
         description="Number of travelers in the group",
@@ -112,6 +141,16 @@ class TravelPlanRequest(BaseModel):
         le=100
     )
 
+    @field_validator("travel_style", mode="before")
+    @classmethod
+    def coerce_travel_style(cls, value: Any) -> Any:
+        """Resolve styles case-insensitively; a single style is accepted."""
+        if isinstance(value, str):
+            value = [value]
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return frozenset(_coerce_style(v) for v in value)
+        return value
+
 class UserPreferences(BaseModel):
     """Stores user preferences and selections."""
     user_id: str
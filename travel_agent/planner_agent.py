@@ -7,7 +7,7 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
 
 from .base import BaseAgent
-from .models import TravelPlanRequest
+from .models import TravelPlanRequest, TravelStyle
 
 class PlannerAgent(BaseAgent):
     """Agent responsible for parsing user input into structured travel plan requests."""
@@ -85,16 +85,20 @@ class PlannerAgent(BaseAgent):
             # Debug: Print all attributes of the result
             print(f"=== DEBUG: Result attributes: {dir(result)}")
             
-            # Ensure all required fields have values
+            # Ensure all required fields have values (the request is frozen, so
+            # defaults are applied to a copy)
+            defaults = {}
             if not hasattr(result, 'travel_style') or not result.travel_style:
                 print("=== DEBUG: Setting default travel_style")
-                result.travel_style = ["cultural"]
+                defaults['travel_style'] = frozenset({TravelStyle.CULTURAL})
             if not hasattr(result, 'budget') or not result.budget:
                 print("=== DEBUG: Setting default budget")
-                result.budget = "mid-range"
+                defaults['budget'] = "mid-range"
             if not hasattr(result, 'interests') or not result.interests:
                 print("=== DEBUG: Setting default interests")
-                result.interests = ["sightseeing"]
+                defaults['interests'] = ("sightseeing",)
+            if defaults:
+                result = result.model_copy(update=defaults)
                 
             print(f"=== DEBUG: Final result before return: {result}")
             print(f"=== DEBUG: Final interests: {getattr(result, 'interests', 'NOT FOUND')}")
@@ -108,7 +112,7 @@ class PlannerAgent(BaseAgent):
     
     def _fallback_parse(self, user_input: str) -> TravelPlanRequest:
         """Fallback parsing logic if the main parsing fails."""
-        from .models import TravelStyle, BudgetLevel  # Import here to avoid circular imports
+        from .models import BudgetLevel  # Import here to avoid circular imports
         
         print("\n=== DEBUG: Entering _fallback_parse")
         
@@ -171,8 +175,8 @@ if __name__ == "__main__":
         print("Parsed Travel Plan Request:")
         print(f"Destination: {result.destination}")
         print(f"Duration: {result.duration_days} days")
-        print(f"Travel Style: {', '.join(result.travel_style) if result.travel_style else 'Not specified'}")
+        print(f"Travel Style: {', '.join(sorted(result.travel_style)) if result.travel_style else 'Not specified'}")
         print(f"Budget: {result.budget or 'Not specified'}")
-        print(f"Constraints: {', '.join(result.constraints) if result.constraints else 'None'}")
+        print(f"Constraints: {', '.join(sorted(result.constraints)) if result.constraints else 'None'}")
     
     asyncio.run(test_planner_agent())
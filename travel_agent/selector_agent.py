@@ -87,10 +87,10 @@ Please select the most suitable POIs for this trip, considering the user's prefe
             response = await self.auto_select_chain.ainvoke({
                 "destination": travel_request.destination,
                 "duration_days": travel_request.duration_days,
-                "travel_style": ", ".join(travel_request.travel_style) if travel_request.travel_style else "Not specified",
+                "travel_style": ", ".join(sorted(travel_request.travel_style)) if travel_request.travel_style else "Not specified",
                 "budget": travel_request.budget or "Not specified",
                 "interests": ", ".join(travel_request.interests) if hasattr(travel_request, 'interests') and travel_request.interests else "Not specified",
-                "constraints": ", ".join(travel_request.constraints) if travel_request.constraints else "None",
+                "constraints": ", ".join(sorted(travel_request.constraints)) if travel_request.constraints else "None",
                 "pois": pois_str
             })
             
@@ -0,0 +1,29 @@
+"""Application settings loaded once from the environment and .env file."""
+from functools import lru_cache
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class Settings(BaseSettings):
+    """Environment-backed configuration shared by the web app and agents."""
+    google_api_key: Optional[str] = None
+    groq_api_key: Optional[str] = None
+    tavily_api_key: Optional[str] = None
+    debug: bool = False
+    # Most locations kept in the FoodAgent suggestions cache
+    food_cache_max_entries: int = 10_000
+    # JSON list in the environment, e.g. CORS_ORIGINS='["https://roameo.example.com"]'
+    cors_origins: List[str] = ["http://localhost:8000"]
+
+    model_config = SettingsConfigDict(extra="ignore")
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, reading .env on first use only.
+
+    The .env file is loaded into ``os.environ`` because the LangChain
+    provider SDKs read their API keys from the environment directly.
+    """
+    load_dotenv()
+    return Settings()
@@ -1,5 +1,6 @@
 """Utility modules for the travel agent."""
 
 from .model_config import ModelConfig
+from .batching import MicroBatcher
 
-__all__ = ['ModelConfig']
+__all__ = ['ModelConfig', 'MicroBatcher']
@@ -0,0 +1,90 @@
+"""Micro-batching of concurrent async calls into a single batch call."""
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+class MicroBatcher:
+    """Collects concurrently submitted items and processes them in batches.
+
+    Items are queued by ``submit``; a background task drains up to
+    ``max_batch_size`` items, waiting at most ``max_wait_ms`` for the batch
+    to fill, and hands them to ``batch_fn`` in a single call (e.g. a
+    LangChain ``abatch``). Each caller receives the result at its position.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def close(self) -> None:
+        """Stop the background worker."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.max_wait
+
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                try:
+                    results = await self.batch_fn([item for item, _ in batch])
+                    if len(results) != len(batch):
+                        raise RuntimeError(
+                            f"batch_fn returned {len(results)} results for {len(batch)} items"
+                        )
+                except Exception as e:
+                    self._fail(batch, e)
+                    continue
+
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            # The worker is stopping (cancelled, or a BaseException escaped
+            # batch_fn): fail the batch in progress and everything still queued
+            # so no caller waits forever
+            error = RuntimeError("MicroBatcher worker stopped")
+            self._fail(batch, error)
+            while not self._queue.empty():
+                self._fail([self._queue.get_nowait()], error)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[Any, asyncio.Future]], error: BaseException) -> None:
+        """Set an exception on every still-pending future in a batch."""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
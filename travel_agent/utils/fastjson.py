@@ -0,0 +1,31 @@
+"""JSON encoding and decoding through orjson, falling back to the standard library."""
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library
+    orjson = None
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON from bytes or a string."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Serialize to UTF-8 JSON bytes, compact unless ``indent`` is set.
+
+    Non-string dictionary keys are converted like the standard library does,
+    and ``default`` is called for objects JSON can't represent.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(
+        obj,
+        indent=2 if indent else None,
+        separators=None if indent else (',', ':'),
+        default=default,
+        ensure_ascii=False
+    ).encode('utf-8')
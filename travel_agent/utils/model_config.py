@@ -1,10 +1,11 @@
 """Utility module for handling model configuration and initialization."""
 import os
 from typing import Dict, Any, Optional
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from ..settings import get_settings
+
+# Make sure the .env file has been loaded into the environment
+get_settings()
 
 class ModelConfig:
     """Handles model configuration and initialization based on environment variables."""
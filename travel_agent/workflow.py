@@ -10,7 +10,7 @@ from langchain_core.messages import AIMessage, BaseMessage
 from langgraph.graph import StateGraph, END
 from typing_extensions import TypedDict, Annotated
 
-from travel_agent.models import TravelPlanRequest, PointOfInterest, TravelItinerary, BudgetLevel
+from travel_agent.models import TravelPlanRequest, PointOfInterest, TravelItinerary, BudgetLevel, TravelStyle
 from travel_agent.planner_agent import PlannerAgent
 from travel_agent.explorer_agent import ExplorerAgent
 from travel_agent.itinerary_agent import ItineraryAgent
@@ -93,13 +93,17 @@ def create_travel_planner_workflow(
             logger.debug(f"TravelPlanRequest fields: {travel_request.__fields__}")
             logger.debug(f"TravelPlanRequest interests: {getattr(travel_request, 'interests', 'NOT FOUND')}")
             
-            # Ensure all required fields are set with defaults if missing
+            # Ensure all required fields are set with defaults if missing (the
+            # request is frozen, so defaults are applied to a copy)
+            defaults = {}
             if not hasattr(travel_request, 'travel_style') or not travel_request.travel_style:
-                travel_request.travel_style = ["cultural"]
+                defaults['travel_style'] = frozenset({TravelStyle.CULTURAL})
             if not hasattr(travel_request, 'budget') or not travel_request.budget:
-                travel_request.budget = "mid-range"
+                defaults['budget'] = "mid-range"
             if not hasattr(travel_request, 'interests') or not travel_request.interests:
-                travel_request.interests = ["sightseeing"]
+                defaults['interests'] = ("sightseeing",)
+            if defaults:
+                travel_request = travel_request.model_copy(update=defaults)
             
             # Debug logging after setting defaults
             logger.debug(f"TravelPlanRequest after setting defaults: {travel_request}")
@@ -368,9 +372,11 @@ def create_travel_planner_workflow(
             # Ensure start_date and end_date are set
             from datetime import date, timedelta
             if not request.start_date:
-                request.start_date = date.today()
+                request = request.model_copy(update={'start_date': date.today()})
             if not request.end_date and request.duration_days:
-                request.end_date = request.start_date + timedelta(days=request.duration_days - 1)
+                request = request.model_copy(update={
+                    'end_date': request.start_date + timedelta(days=request.duration_days - 1)
+                })
             
             # Debug: Print the selected_pois before passing to itinerary agent
             print(f"DEBUG: Selected POIs before passing to itinerary agent: {selected_pois}")